@@ -24,6 +24,68 @@ def column_exists(cursor, table_name, column_name):
     return column_name in columns
 
 
+def index_exists(cursor, index_name):
+    """检查是否存在指定索引"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,))
+    return cursor.fetchone() is not None
+
+
+# FTS5 trigram 全文索引: 使 LIKE '%关键词%' 子串搜索可以走索引
+# 表名 -> (源表, 索引列)
+FTS_TABLES = {
+    "redemption_codes_fts": ("redemption_codes", ("code", "used_by_email")),
+    "teams_fts": ("teams", ("email", "account_id", "team_name")),
+}
+
+# 当前数据库中已可用的 FTS 表 (迁移时填充，供服务层判断是否走全文索引)
+available_fts_tables = set()
+
+
+def table_exists(cursor, table_name):
+    """检查是否存在指定表"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    return cursor.fetchone() is not None
+
+
+def has_fts_table(table_name):
+    """判断指定 FTS 表是否可用"""
+    return table_name in available_fts_tables
+
+
+def create_fts_table(cursor, fts_name, source_table, columns):
+    """
+    创建 external content 的 FTS5 trigram 表，并通过触发器与源表保持同步
+
+    SQLite 未编译 FTS5 或版本低于 3.34 (不支持 trigram) 时会抛出 sqlite3.OperationalError
+    """
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE {fts_name} USING fts5(
+            {cols}, content='{source_table}', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {source_table} BEGIN
+            INSERT INTO {fts_name}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {source_table} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE OF {cols} ON {source_table} BEGIN
+            INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts_name}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    # 为已有数据建立索引
+    cursor.execute(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')")
+
+
 def run_auto_migration():
     """
     自动运行数据库迁移
@@ -109,6 +171,42 @@ def run_auto_migration():
             logger.info("添加 teams.account_role 字段")
             cursor.execute("ALTER TABLE teams ADD COLUMN account_role VARCHAR(50)")
             migrations_applied.append("teams.account_role")
+
+        # 检查并添加 keyset 分页使用的 (created_at, id) 复合索引
+        if not index_exists(cursor, "idx_team_created_id"):
+            logger.info("添加 teams(created_at, id) 索引")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_created_id ON teams (created_at, id)")
+            migrations_applied.append("idx_team_created_id")
+
+        if not index_exists(cursor, "idx_code_created_id"):
+            logger.info("添加 redemption_codes(created_at, id) 索引")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_created_id ON redemption_codes (created_at, id)")
+            migrations_applied.append("idx_code_created_id")
+
+        # 检查并添加使用记录筛选/排序使用的索引
+        if not index_exists(cursor, "idx_record_redeemed_id"):
+            logger.info("添加 redemption_records(redeemed_at, id) 索引")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_record_redeemed_id ON redemption_records (redeemed_at, id)")
+            migrations_applied.append("idx_record_redeemed_id")
+
+        if not index_exists(cursor, "idx_record_team_redeemed"):
+            logger.info("添加 redemption_records(team_id, redeemed_at) 索引")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_record_team_redeemed ON redemption_records (team_id, redeemed_at)")
+            migrations_applied.append("idx_record_team_redeemed")
+
+        # 检查并创建搜索使用的 FTS5 trigram 索引 (不支持时回退到普通 LIKE 扫描)
+        for fts_name, (source_table, columns) in FTS_TABLES.items():
+            if table_exists(cursor, fts_name):
+                available_fts_tables.add(fts_name)
+                continue
+            try:
+                logger.info(f"添加 {source_table} 全文搜索索引 {fts_name}")
+                create_fts_table(cursor, fts_name, source_table, columns)
+                available_fts_tables.add(fts_name)
+                migrations_applied.append(fts_name)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"当前 SQLite 不支持 FTS5 trigram，搜索将使用普通 LIKE 查询: {e}")
+                break
         
         # 提交更改
         conn.commit()
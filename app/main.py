@@ -4,14 +4,12 @@ FastAPI 应用入口文件
 """
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 import logging
 import asyncio
 from pathlib import Path
-from datetime import datetime
 
 from contextlib import asynccontextmanager
 # 导入路由
@@ -19,6 +17,7 @@ from app.routes import redeem, auth, admin, api, user, warranty
 from app.config import settings
 from app.database import init_db, close_db, AsyncSessionLocal
 from app.services.auth import auth_service
+from app.templating import templates
 
 # 获取项目根目录
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -138,44 +137,6 @@ app.add_middleware(NoCacheAdminMiddleware)
 # 配置静态文件
 app.mount("/static", StaticFiles(directory=str(APP_DIR / "static")), name="static")
 
-# 配置模板引擎
-templates = Jinja2Templates(directory=str(APP_DIR / "templates"))
-templates.env.globals["static_version"] = int(datetime.utcnow().timestamp())
-
-# 添加模板过滤器
-def format_datetime(dt):
-    """格式化日期时间"""
-    if not dt:
-        return "-"
-    if isinstance(dt, str):
-        try:
-            # 兼容包含时区信息的字符串
-            dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
-        except:
-            return dt
-    
-    # 统一转换为北京时间显示 (如果它是 aware datetime)
-    import pytz
-    from app.config import settings
-    if dt.tzinfo is None:
-        # 如果是 naive datetime，假设它是本地时区（CST）的时间
-        pass
-    else:
-        # 如果是 aware datetime，转换为目标时区
-        tz = pytz.timezone(settings.timezone)
-        dt = dt.astimezone(tz)
-        
-    return dt.strftime("%Y-%m-%d %H:%M")
-
-def escape_js(value):
-    """转义字符串用于 JavaScript"""
-    if not value:
-        return ""
-    return value.replace("\\", "\\\\").replace("'", "\\'").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
-
-templates.env.filters["format_datetime"] = format_datetime
-templates.env.filters["escape_js"] = escape_js
-
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +40,7 @@ class Team(Base):
     # 索引
     __table_args__ = (
         Index("idx_status", "status"),
+        Index("idx_team_created_id", "created_at", "id"),
     )
 
 
@@ -82,10 +83,18 @@ class RedemptionCode(Base):
 
     # 关系
     redemption_records = relationship("RedemptionRecord", back_populates="redemption_code")
+    # bound_team_id 没有外键约束，需显式指定 foreign() 连接条件
+    bound_team = relationship(
+        "Team",
+        primaryjoin="foreign(RedemptionCode.bound_team_id) == Team.id",
+        viewonly=True
+    )
+    used_team = relationship("Team", foreign_keys=[used_team_id], viewonly=True)
 
     # 索引
     __table_args__ = (
         Index("idx_code_status", "code", "status"),
+        Index("idx_code_created_id", "created_at", "id"),
     )
 
 
@@ -108,6 +117,8 @@ class RedemptionRecord(Base):
     # 索引
     __table_args__ = (
         Index("idx_email", "email"),
+        Index("idx_record_redeemed_id", "redeemed_at", "id"),
+        Index("idx_record_team_redeemed", "team_id", "redeemed_at"),
     )
 
 
@@ -2,32 +2,79 @@
 管理员路由
 处理管理员面板的所有页面和操作
 """
+import asyncio
 import logging
-from typing import Optional, List
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
-import json
+from fastapi.routing import APIRoute
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import Response
+import orjson
+import xlsxwriter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, and_, select
-from pydantic import BaseModel, Field
+from sqlalchemy import func, and_, select, delete
+from pydantic import BaseModel, Field, ValidationError
 
-from app.database import get_db
-from app.models import Team, RedemptionCode
+from app.database import get_db, AsyncSessionLocal
+from app.models import Team, RedemptionCode, RedemptionRecord
 from app.dependencies.auth import require_admin
 from app.services.team import TeamService
 from app.services.redemption import RedemptionService
-from app.utils.time_utils import get_now
+from app.services.settings import settings_service
+from app.services.chatgpt import chatgpt_service
+from app.utils.pricing import calculate_remaining_days_batch, calculate_prices_cents_batch, format_price_yuan
+from app.utils.time_utils import get_now, get_period_starts
+from app.templating import templates
 
 logger = logging.getLogger(__name__)
 
+
+class AdminRoute(APIRoute):
+    """
+    管理后台路由: 统一处理路由中未捕获的异常
+
+    记录一次堆栈后直接返回 500 (异常不再向上抛出，避免服务器重复记录)，
+    且不向客户端返回异常详情；页面路由沿用 HTTPException 的错误处理
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        is_page = isinstance(self.response_class, type) and issubclass(self.response_class, HTMLResponse)
+
+        async def route_handler(request: Request) -> Response:
+            try:
+                return await handler(request)
+            except (StarletteHTTPException, RequestValidationError):
+                raise
+            except Exception:
+                logger.exception("请求处理失败: %s %s", request.method, request.url.path)
+                if is_page:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="加载页面失败"
+                    )
+                return ORJSONResponse(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    content={"success": False, "error": "服务器内部错误"}
+                )
+
+        return route_handler
+
+
 # 创建路由器
 router = APIRouter(
     prefix="/admin",
-    tags=["admin"]
+    tags=["admin"],
+    default_response_class=ORJSONResponse,
+    route_class=AdminRoute
 )
 
-import json
-
 # 服务实例
 team_service = TeamService()
 redemption_service = RedemptionService()
@@ -80,73 +127,103 @@ class BulkCodeDeleteRequest(BaseModel):
     codes: List[str] = Field(..., description="兑换码列表")
 
 
+async def parse_bulk_code_delete_request(
+    request: Request,
+    current_user: dict = Depends(require_admin)
+) -> BulkCodeDeleteRequest:
+    """
+    解析批量删除请求体
+
+    codes 列表可能很长，直接交给 pydantic-core 解析原始 JSON 字节，
+    省去 json.loads -> dict -> 模型校验 的二次遍历
+
+    依赖 require_admin: 先校验登录再读取请求体，未登录请求不会收到 422 校验详情
+    """
+    try:
+        return BulkCodeDeleteRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
+
+# 控制台统计查询 (模块级构建一次，复用表达式树与 SQLAlchemy 编译缓存)
+_TEAM_STATS_STMT = select(
+    func.count(Team.id),
+    func.count(Team.id).filter(
+        and_(Team.status == "active", Team.current_members < Team.max_members)
+    )
+)
+_CODE_STATS_STMT = select(
+    func.count(RedemptionCode.id),
+    func.count(RedemptionCode.id).filter(
+        RedemptionCode.status.in_(["used", "warranty_active"])
+    )
+)
+
+
+async def _get_dashboard_stats(db_session: AsyncSession):
+    """
+    使用聚合 COUNT ... FILTER 查询获取控制台统计信息 (Team / 兑换码各一次查询)
+
+    Returns:
+        (total_teams, available_teams, total_codes, used_codes)
+    """
+    total_teams, available_teams = (await db_session.execute(_TEAM_STATS_STMT)).one()
+    total_codes, used_codes = (await db_session.execute(_CODE_STATS_STMT)).one()
+    return total_teams, available_teams, total_codes, used_codes
+
+
 @router.get("/", response_class=HTMLResponse)
 async def admin_dashboard(
     request: Request,
     page: int = 1,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
     """
     管理员面板首页
     """
-    try:
-        from app.main import templates
-        logger.info(f"管理员访问控制台, search={search}, page={page}")
-
-        # 设置每页数量
-        per_page = 20
-        
-        # 获取 Team 列表 (分页)
-        teams_result = await team_service.get_all_teams(db, page=page, per_page=per_page, search=search)
-        
-        # 使用高效的 COUNT 查询获取统计信息
-        total_teams = (await db.execute(select(func.count(Team.id)))).scalar() or 0
-        available_teams = (await db.execute(
-            select(func.count(Team.id)).where(
-                and_(Team.status == "active", Team.current_members < Team.max_members)
-            )
-        )).scalar() or 0
-        total_codes = (await db.execute(select(func.count(RedemptionCode.id)))).scalar() or 0
-        used_codes = (await db.execute(
-            select(func.count(RedemptionCode.id)).where(
-                RedemptionCode.status.in_(["used", "warranty_active"])
-            )
-        )).scalar() or 0
-
-        stats = {
-            "total_teams": total_teams,
-            "available_teams": available_teams,
-            "total_codes": total_codes,
-            "used_codes": used_codes
-        }
+    logger.info("管理员访问控制台, search=%s, page=%s", search, page)
+
+    # 设置每页数量
+    per_page = 20
+    
+    # Team 列表与统计信息互不依赖，使用独立会话并发查询
+    # (同一个 AsyncSession 不能在并发 await 中共用)
+    async with AsyncSessionLocal() as stats_db:
+        teams_result, (total_teams, available_teams, total_codes, used_codes) = await asyncio.gather(
+            team_service.get_all_teams(db, page=page, per_page=per_page, search=search, cursor=cursor),
+            _get_dashboard_stats(stats_db)
+        )
 
-        return templates.TemplateResponse(
-            "admin/index.html",
-            {
-                "request": request,
-                "user": current_user,
-                "active_page": "dashboard",
-                "teams": teams_result.get("teams", []),
-                "stats": stats,
-                "search": search,
-                "pagination": {
-                    "current_page": teams_result.get("current_page", page),
-                    "total_pages": teams_result.get("total_pages", 1),
-                    "total": teams_result.get("total", 0),
-                    "per_page": per_page
-                }
+    stats = {
+        "total_teams": total_teams or 0,
+        "available_teams": available_teams or 0,
+        "total_codes": total_codes or 0,
+        "used_codes": used_codes or 0
+    }
+
+    return templates.TemplateResponse(
+        "admin/index.html",
+        {
+            "request": request,
+            "user": current_user,
+            "active_page": "dashboard",
+            "teams": teams_result.get("teams", []),
+            "stats": stats,
+            "search": search,
+            "pagination": {
+                "current_page": teams_result.get("current_page", page),
+                "total_pages": teams_result.get("total_pages", 1),
+                "total": teams_result.get("total", 0),
+                "per_page": per_page,
+                "next_cursor": teams_result.get("next_cursor")
             }
-        )
-    except Exception as e:
-        logger.error(f"加载管理员面板失败: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"加载管理员面板失败: {str(e)}"
-        )
+        }
+    )
 
 
 @router.post("/teams/{team_id}/delete")
@@ -166,29 +243,19 @@ async def delete_team(
     Returns:
         删除结果
     """
-    try:
-        logger.info(f"管理员删除 Team: {team_id}")
+    logger.info("管理员删除 Team: %s", team_id)
 
-        result = await team_service.delete_team(team_id, db)
+    result = await team_service.delete_team(team_id, db)
 
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
-
-        return JSONResponse(content=result)
-
-    except Exception as e:
-        logger.error(f"删除 Team 失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"删除 Team 失败: {str(e)}"
-            }
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
         )
 
+    _invalidate_team_options_cache()
+    return ORJSONResponse(content=result)
+
 
 @router.get("/teams/{team_id}/info")
 async def get_team_info(
@@ -197,19 +264,13 @@ async def get_team_info(
     current_user: dict = Depends(require_admin)
 ):
     """获取 Team 详情 (包含解密后的 Token)"""
-    try:
-        result = await team_service.get_team_by_id(team_id, db)
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_404_NOT_FOUND,
-                content=result
-            )
-        return JSONResponse(content=result)
-    except Exception as e:
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"success": False, "error": str(e)}
+    result = await team_service.get_team_by_id(team_id, db)
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=result
         )
+    return ORJSONResponse(content=result)
 
 
 @router.post("/teams/{team_id}/update")
@@ -220,31 +281,26 @@ async def update_team(
     current_user: dict = Depends(require_admin)
 ):
     """更新 Team 信息"""
-    try:
-        result = await team_service.update_team(
-            team_id=team_id,
-            db_session=db,
-            email=update_data.email,
-            account_id=update_data.account_id,
-            access_token=update_data.access_token,
-            refresh_token=update_data.refresh_token,
-            session_token=update_data.session_token,
-            client_id=update_data.client_id,
-            max_members=update_data.max_members,
-            team_name=update_data.team_name,
-            status=update_data.status
-        )
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
-        return JSONResponse(content=result)
-    except Exception as e:
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"success": False, "error": str(e)}
+    result = await team_service.update_team(
+        team_id=team_id,
+        db_session=db,
+        email=update_data.email,
+        account_id=update_data.account_id,
+        access_token=update_data.access_token,
+        refresh_token=update_data.refresh_token,
+        session_token=update_data.session_token,
+        client_id=update_data.client_id,
+        max_members=update_data.max_members,
+        team_name=update_data.team_name,
+        status=update_data.status
+    )
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
         )
+    _invalidate_team_options_cache()
+    return ORJSONResponse(content=result)
 
 
 
@@ -266,68 +322,60 @@ async def team_import(
     Returns:
         导入结果
     """
-    try:
-        logger.info(f"管理员导入 Team: {import_data.import_type}")
-
-        if import_data.import_type == "single":
-            # 单个导入
-            if not import_data.access_token:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={
-                        "success": False,
-                        "error": "Access Token 不能为空"
-                    }
-                )
-
-            result = await team_service.import_team_single(
-                access_token=import_data.access_token,
-                db_session=db,
-                email=import_data.email,
-                account_id=import_data.account_id,
-                refresh_token=import_data.refresh_token,
-                session_token=import_data.session_token,
-                client_id=import_data.client_id
-            )
-
-            if not result["success"]:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content=result
-                )
-
-            return JSONResponse(content=result)
+    logger.info("管理员导入 Team: %s", import_data.import_type)
 
-        elif import_data.import_type == "batch":
-            # 批量导入使用 StreamingResponse
-            async def progress_generator():
-                async for status_item in team_service.import_team_batch(
-                    text=import_data.content,
-                    db_session=db
-                ):
-                    yield json.dumps(status_item, ensure_ascii=False) + "\n"
-
-            return StreamingResponse(
-                progress_generator(),
-                media_type="application/x-ndjson"
-            )
-
-        else:
-            return JSONResponse(
+    if import_data.import_type == "single":
+        # 单个导入
+        if not import_data.access_token:
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     "success": False,
-                    "error": "无效的导入类型"
+                    "error": "Access Token 不能为空"
                 }
             )
 
-    except Exception as e:
-        logger.error(f"导入 Team 失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        result = await team_service.import_team_single(
+            access_token=import_data.access_token,
+            db_session=db,
+            email=import_data.email,
+            account_id=import_data.account_id,
+            refresh_token=import_data.refresh_token,
+            session_token=import_data.session_token,
+            client_id=import_data.client_id
+        )
+
+        if not result["success"]:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=result
+            )
+
+        _invalidate_team_options_cache()
+        return ORJSONResponse(content=result)
+
+    elif import_data.import_type == "batch":
+        # 批量导入使用 StreamingResponse
+        async def progress_generator():
+            async for status_item in team_service.import_team_batch(
+                text=import_data.content,
+                db_session=db
+            ):
+                # orjson 直接输出 UTF-8 bytes (不做 ASCII 转义，等价于 ensure_ascii=False)
+                yield orjson.dumps(status_item) + b"\n"
+            _invalidate_team_options_cache()
+
+        return StreamingResponse(
+            progress_generator(),
+            media_type="application/x-ndjson"
+        )
+
+    else:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
             content={
                 "success": False,
-                "error": f"导入失败: {str(e)}"
+                "error": "无效的导入类型"
             }
         )
 
@@ -352,19 +400,9 @@ async def team_members_list(
     Returns:
         成员列表 JSON
     """
-    try:
-        # 获取成员列表
-        result = await team_service.get_team_members(team_id, db)
-        return JSONResponse(content=result)
-    except Exception as e:
-        logger.error(f"获取成员列表失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"获取成员列表失败: {str(e)}"
-            }
-        )
+    # 获取成员列表
+    result = await team_service.get_team_members(team_id, db)
+    return ORJSONResponse(content=result)
 
 
 @router.post("/teams/{team_id}/members/add")
@@ -386,32 +424,22 @@ async def add_team_member(
     Returns:
         添加结果
     """
-    try:
-        logger.info(f"管理员添加成员到 Team {team_id}: {member_data.email}")
-
-        result = await team_service.add_team_member(
-            team_id=team_id,
-            email=member_data.email,
-            db_session=db
+    logger.info("管理员添加成员到 Team %s: %s", team_id, member_data.email)
+
+    result = await team_service.add_team_member(
+        team_id=team_id,
+        email=member_data.email,
+        db_session=db
+    )
+
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
         )
 
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
-
-        return JSONResponse(content=result)
-
-    except Exception as e:
-        logger.error(f"添加成员失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"添加成员失败: {str(e)}"
-            }
-        )
+    _invalidate_team_options_cache()
+    return ORJSONResponse(content=result)
 
 
 @router.post("/teams/{team_id}/members/{user_id}/delete")
@@ -433,32 +461,22 @@ async def delete_team_member(
     Returns:
         删除结果
     """
-    try:
-        logger.info(f"管理员从 Team {team_id} 删除成员: {user_id}")
-
-        result = await team_service.delete_team_member(
-            team_id=team_id,
-            user_id=user_id,
-            db_session=db
+    logger.info("管理员从 Team %s 删除成员: %s", team_id, user_id)
+
+    result = await team_service.delete_team_member(
+        team_id=team_id,
+        user_id=user_id,
+        db_session=db
+    )
+
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
         )
 
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
-
-        return JSONResponse(content=result)
-
-    except Exception as e:
-        logger.error(f"删除成员失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"删除成员失败: {str(e)}"
-            }
-        )
+    _invalidate_team_options_cache()
+    return ORJSONResponse(content=result)
 
 
 @router.post("/teams/{team_id}/invites/revoke")
@@ -480,35 +498,42 @@ async def revoke_team_invite(
     Returns:
         撤回结果
     """
-    try:
-        logger.info(f"管理员从 Team {team_id} 撤回邀请: {member_data.email}")
-
-        result = await team_service.revoke_team_invite(
-            team_id=team_id,
-            email=member_data.email,
-            db_session=db
+    logger.info("管理员从 Team %s 撤回邀请: %s", team_id, member_data.email)
+
+    result = await team_service.revoke_team_invite(
+        team_id=team_id,
+        email=member_data.email,
+        db_session=db
+    )
+
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
         )
 
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
+    return ORJSONResponse(content=result)
 
-        return JSONResponse(content=result)
 
-    except Exception as e:
-        logger.error(f"撤回邀请失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"撤回邀请失败: {str(e)}"
-            }
-        )
+# ==================== Team 选项(用于生成兑换码绑定) ====================
 
+# Team 选项缓存: 打开生成兑换码弹窗时频繁请求，而可用 Team 变化不频繁
+TEAM_OPTIONS_CACHE_TTL = 30
+_team_options_cache: Dict[str, Any] = {"result": None, "time": 0.0}
+_team_options_lock = asyncio.Lock()
 
-# ==================== Team 选项(用于生成兑换码绑定) ====================
+
+def _get_cached_team_options() -> Optional[Dict[str, Any]]:
+    """获取未过期的 Team 选项缓存"""
+    if time.monotonic() - _team_options_cache["time"] < TEAM_OPTIONS_CACHE_TTL:
+        return _team_options_cache["result"]
+    return None
+
+
+def _invalidate_team_options_cache():
+    """Team / 兑换码发生变更后清除 Team 选项缓存"""
+    _team_options_cache["result"] = None
+    _team_options_cache["time"] = 0.0
 
 @router.get("/teams/options")
 async def get_team_options(
@@ -521,9 +546,19 @@ async def get_team_options(
     Returns:
         { success: bool, teams: [...], error: str | null }
     """
-    result = await team_service.get_available_teams_for_admin(db)
+    result = _get_cached_team_options()
+    if result is None:
+        async with _team_options_lock:
+            # 双重检查: 其它请求可能已在等待锁期间刷新了缓存
+            result = _get_cached_team_options()
+            if result is None:
+                result = await team_service.get_available_teams_for_admin(db)
+                if result.get("success"):
+                    _team_options_cache["result"] = result
+                    _team_options_cache["time"] = time.monotonic()
+
     if not result.get("success"):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "success": False,
@@ -532,7 +567,7 @@ async def get_team_options(
             }
         )
 
-    return JSONResponse(content=result)
+    return ORJSONResponse(content=result)
 
 
 # ==================== 兑换码管理路由 ====================
@@ -542,6 +577,7 @@ async def codes_list_page(
     request: Request,
     page: int = 1,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
@@ -552,166 +588,141 @@ async def codes_list_page(
         request: FastAPI Request 对象
         page: 页码
         search: 搜索关键词
+        cursor: 分页游标 (下一页链接携带，使用 keyset 分页)
         db: 数据库会话
         current_user: 当前用户（需要登录）
 
     Returns:
         兑换码列表页面 HTML
     """
-    try:
-        from app.main import templates
-
-        logger.info(f"管理员访问兑换码列表页面, search={search}")
-
-        # 获取兑换码 (分页)
-        per_page = 50
-        codes_result = await redemption_service.get_all_codes(db, page=page, per_page=per_page, search=search)
-        codes = codes_result.get("codes", [])
-        total_codes = codes_result.get("total", 0)
-        total_pages = codes_result.get("total_pages", 1)
-        current_page = codes_result.get("current_page", 1)
-
-        # 为了统计数据，我们需要获取所有统计（或者增加统计接口）
-        # 这里暂时获取全部用于统计
-        all_codes_result = await redemption_service.get_all_codes(db, page=1, per_page=10000)
-        all_codes = all_codes_result.get("codes", [])
-
-        # 计算统计数据
-        stats = {
-            "total": total_codes,
-            "unused": len([c for c in all_codes if c["status"] == "unused"]),
-            # 已使用：普通码 used + 质保码 warranty_active
-            "used": len([c for c in all_codes if c["status"] in ["used", "warranty_active"]]),
-            "expired": len([c for c in all_codes if c["status"] == "expired"])
-        }
 
-        # 格式化日期时间
-        from datetime import datetime
-        for code in codes:
-            if code.get("created_at"):
-                dt = datetime.fromisoformat(code["created_at"])
-                code["created_at"] = dt.strftime("%Y-%m-%d %H:%M")
-            if code.get("expires_at"):
-                dt = datetime.fromisoformat(code["expires_at"])
-                code["expires_at"] = dt.strftime("%Y-%m-%d %H:%M")
-            if code.get("used_at"):
-                dt = datetime.fromisoformat(code["used_at"])
-                code["used_at"] = dt.strftime("%Y-%m-%d %H:%M")
-
-        # 绑定 Team 的价格信息 (用于按剩余时间展示)
-        from sqlalchemy import select, func
-        from app.models import Team, RedemptionRecord
-        from app.utils.pricing import calculate_remaining_days, calculate_price_cents, format_price_yuan
-        from app.utils.time_utils import get_now
-        from datetime import timedelta
-
-        team_ids = set()
-        for c in codes:
-            team_id = c.get("bound_team_id") or c.get("used_team_id")
-            if team_id:
-                team_ids.add(team_id)
-        team_map = {}
-        if team_ids:
-            stmt = select(Team).where(Team.id.in_(list(team_ids)))
-            result = await db.execute(stmt)
-            teams = result.scalars().all()
-            team_map = {t.id: t for t in teams}
-
-        for code in codes:
-            code["display_team_id"] = code.get("bound_team_id") or code.get("used_team_id")
-            if code.get("bound_team_id"):
-                code["display_team_source"] = "绑定"
-            elif code.get("used_team_id"):
-                code["display_team_source"] = "使用"
-            else:
-                code["display_team_source"] = None
-
-            code["display_team_name"] = None
-            code["display_remaining_days"] = None
-            code["display_price_yuan"] = None
-
-            team_id = code.get("display_team_id")
-            if team_id:
-                team = team_map.get(team_id)
-                if team:
-                    remaining_days = calculate_remaining_days(team.expires_at)
-                    price_cents = calculate_price_cents(remaining_days)
-                    code["display_team_name"] = team.team_name or f"Team {team.id}"
-                    code["display_team_role"] = team.account_role
-                    code["display_remaining_days"] = remaining_days
-                    code["display_price_yuan"] = format_price_yuan(price_cents)
-
-        # 质保剩余天数展示：默认跟随绑定 Team 到期（Team 到期质保即结束）
-        # - 若该码已绑定/使用过 Team，则直接展示该 Team 的剩余天数
-        # - 若没有 Team 信息，再回退到“首次使用时间 + 质保天数”
-        warranty_codes = [
-            c["code"]
-            for c in codes
-            if c.get("has_warranty") and c.get("status") != "unused" and not c.get("display_team_id")
-        ]
-        activation_map = {}
-        if warranty_codes:
-            stmt = (
-                select(RedemptionRecord.code, func.min(RedemptionRecord.redeemed_at))
-                .where(RedemptionRecord.code.in_(warranty_codes))
-                .group_by(RedemptionRecord.code)
-            )
-            result = await db.execute(stmt)
-            activation_map = {code: activated_at for code, activated_at in result.all()}
-
-        now = get_now()
-        for code in codes:
-            code["warranty_remaining_days"] = None
-            if not code.get("has_warranty"):
-                continue
-
-            # 有绑定/使用 Team：质保随 Team 到期
-            if code.get("display_remaining_days") is not None:
-                code["warranty_remaining_days"] = int(code["display_remaining_days"])
-                continue
-
-            if code.get("status") == "unused":
-                continue
-
-            activated_at = activation_map.get(code["code"])
-            days = int(code.get("warranty_days") or 30)
-            expiry_dt = None
-
-            if activated_at:
-                expiry_dt = activated_at + timedelta(days=days)
-            elif code.get("warranty_expires_at"):
-                try:
-                    expiry_dt = datetime.fromisoformat(code["warranty_expires_at"])
-                except Exception:
-                    expiry_dt = None
-
-            if expiry_dt:
-                code["warranty_remaining_days"] = max((expiry_dt.date() - now.date()).days, 0)
+    logger.info("管理员访问兑换码列表页面, search=%s", search)
 
-        return templates.TemplateResponse(
-            "admin/codes/index.html",
-            {
-                "request": request,
-                "user": current_user,
-                "active_page": "codes",
-                "codes": codes,
-                "stats": stats,
-                "search": search,
-                "pagination": {
-                    "current_page": current_page,
-                    "total_pages": total_pages,
-                    "total": total_codes,
-                    "per_page": per_page
-                }
-            }
+    # 获取兑换码 (分页)
+    per_page = 50
+    # 兑换码列表与状态统计互不依赖，使用独立会话并发查询
+    async with AsyncSessionLocal() as stats_db:
+        codes_result, status_counts = await asyncio.gather(
+            redemption_service.get_all_codes(db, page=page, per_page=per_page, search=search, cursor=cursor),
+            redemption_service.get_status_counts(stats_db)
         )
-
-    except Exception as e:
-        logger.error(f"加载兑换码列表页面失败: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"加载页面失败: {str(e)}"
+    codes = codes_result.get("codes", [])
+    total_codes = codes_result.get("total", 0)
+    total_pages = codes_result.get("total_pages", 1)
+    current_page = codes_result.get("current_page", 1)
+
+    # 统计数据 (数据库 GROUP BY 聚合)
+    stats = {
+        "total": total_codes,
+        "unused": status_counts.get("unused", 0),
+        # 已使用：普通码 used + 质保码 warranty_active
+        "used": status_counts.get("used", 0) + status_counts.get("warranty_active", 0),
+        "expired": status_counts.get("expired", 0)
+    }
+
+    # 格式化日期时间 (服务层返回 datetime 对象，无需再解析)
+    for code in codes:
+        for field in ("created_at", "expires_at", "used_at"):
+            if code.get(field):
+                code[field] = code[field].strftime("%Y-%m-%d %H:%M")
+
+    # 绑定 Team 的价格信息 (用于按剩余时间展示)
+    # 关联 Team 已由 get_all_codes 随主查询加载
+    team_map = {code["team"].id: code["team"] for code in codes if code.get("team")}
+
+    # 每个 Team 的剩余天数/价格只计算一次
+    display_teams = list(team_map.values())
+    remaining_days_list = calculate_remaining_days_batch(team.expires_at for team in display_teams)
+    price_cents_list = calculate_prices_cents_batch(remaining_days_list)
+    team_display_map = {
+        team.id: {
+            "display_team_name": team.team_name or f"Team {team.id}",
+            "display_team_role": team.account_role,
+            "display_remaining_days": remaining_days,
+            "display_price_yuan": format_price_yuan(price_cents)
+        }
+        for team, remaining_days, price_cents in zip(display_teams, remaining_days_list, price_cents_list)
+    }
+
+    for code in codes:
+        code["display_team_id"] = code.get("bound_team_id") or code.get("used_team_id")
+        if code.get("bound_team_id"):
+            code["display_team_source"] = "绑定"
+        elif code.get("used_team_id"):
+            code["display_team_source"] = "使用"
+        else:
+            code["display_team_source"] = None
+
+        code["display_team_name"] = None
+        code["display_remaining_days"] = None
+        code["display_price_yuan"] = None
+
+        team_id = code.get("display_team_id")
+        if team_id and team_id in team_display_map:
+            code.update(team_display_map[team_id])
+
+    # 质保剩余天数展示：默认跟随绑定 Team 到期（Team 到期质保即结束）
+    # - 若该码已绑定/使用过 Team，则直接展示该 Team 的剩余天数
+    # - 若没有 Team 信息，再回退到“首次使用时间 + 质保天数”
+    # 首次使用时间只对没有 Team 信息的已使用质保码查询
+    activation_map = {}
+    activation_codes = [
+        c["code"] for c in codes
+        if c.get("has_warranty") and c.get("status") != "unused" and not c.get("display_team_id")
+    ]
+    if activation_codes:
+        result = await db.execute(
+            select(RedemptionRecord.code, func.min(RedemptionRecord.redeemed_at))
+            .where(RedemptionRecord.code.in_(activation_codes))
+            .group_by(RedemptionRecord.code)
         )
+        activation_map = dict(result.all())
+
+    now = get_now()
+    for code in codes:
+        code["warranty_remaining_days"] = None
+        if not code.get("has_warranty"):
+            continue
+
+        # 有绑定/使用 Team：质保随 Team 到期
+        if code.get("display_remaining_days") is not None:
+            code["warranty_remaining_days"] = int(code["display_remaining_days"])
+            continue
+
+        if code.get("status") == "unused":
+            continue
+
+        # 仅对没有 Team 信息的码使用首次使用时间推算
+        activated_at = activation_map.get(code["code"])
+        days = int(code.get("warranty_days") or 30)
+        expiry_dt = None
+
+        if activated_at:
+            expiry_dt = activated_at + timedelta(days=days)
+        elif code.get("warranty_expires_at"):
+            expiry_dt = code["warranty_expires_at"]
+
+        if expiry_dt:
+            code["warranty_remaining_days"] = max((expiry_dt.date() - now.date()).days, 0)
+
+    return templates.TemplateResponse(
+        "admin/codes/index.html",
+        {
+            "request": request,
+            "user": current_user,
+            "active_page": "codes",
+            "codes": codes,
+            "stats": stats,
+            "search": search,
+            "pagination": {
+                "current_page": current_page,
+                "total_pages": total_pages,
+                "total": total_codes,
+                "per_page": per_page,
+                "next_cursor": codes_result.get("next_cursor")
+            }
+        }
+    )
 
 
 
@@ -733,72 +744,63 @@ async def generate_codes(
     Returns:
         生成结果
     """
-    try:
-        logger.info(f"管理员生成兑换码: {generate_data.type}")
-
-        if generate_data.type == "single":
-            # 单个生成
-            result = await redemption_service.generate_code_single(
-                db_session=db,
-                code=generate_data.code,
-                bound_team_id=generate_data.team_id,
-                expires_days=generate_data.expires_days,
-                has_warranty=generate_data.has_warranty,
-                warranty_days=generate_data.warranty_days
-            )
-
-            if not result["success"]:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content=result
-                )
-
-            return JSONResponse(content=result)
+    logger.info("管理员生成兑换码: %s", generate_data.type)
 
-        elif generate_data.type == "batch":
-            # 批量生成
-            if not generate_data.count:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={
-                        "success": False,
-                        "error": "生成数量不能为空"
-                    }
-                )
+    if generate_data.type == "single":
+        # 单个生成
+        result = await redemption_service.generate_code_single(
+            db_session=db,
+            code=generate_data.code,
+            bound_team_id=generate_data.team_id,
+            expires_days=generate_data.expires_days,
+            has_warranty=generate_data.has_warranty,
+            warranty_days=generate_data.warranty_days
+        )
 
-            result = await redemption_service.generate_code_batch(
-                db_session=db,
-                count=generate_data.count,
-                bound_team_id=generate_data.team_id,
-                expires_days=generate_data.expires_days,
-                has_warranty=generate_data.has_warranty,
-                warranty_days=generate_data.warranty_days
+        if not result["success"]:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=result
             )
 
-            if not result["success"]:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content=result
-                )
+        _invalidate_team_options_cache()
+        return ORJSONResponse(content=result)
 
-            return JSONResponse(content=result)
-
-        else:
-            return JSONResponse(
+    elif generate_data.type == "batch":
+        # 批量生成
+        if not generate_data.count:
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     "success": False,
-                    "error": "无效的生成类型"
+                    "error": "生成数量不能为空"
                 }
             )
 
-    except Exception as e:
-        logger.error(f"生成兑换码失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        result = await redemption_service.generate_code_batch(
+            db_session=db,
+            count=generate_data.count,
+            bound_team_id=generate_data.team_id,
+            expires_days=generate_data.expires_days,
+            has_warranty=generate_data.has_warranty,
+            warranty_days=generate_data.warranty_days
+        )
+
+        if not result["success"]:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=result
+            )
+
+        _invalidate_team_options_cache()
+        return ORJSONResponse(content=result)
+
+    else:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
             content={
                 "success": False,
-                "error": f"生成失败: {str(e)}"
+                "error": "无效的生成类型"
             }
         )
 
@@ -820,28 +822,38 @@ async def delete_code(
     Returns:
         删除结果
     """
-    try:
-        logger.info(f"管理员删除兑换码: {code}")
+    logger.info("管理员删除兑换码: %s", code)
 
-        result = await redemption_service.delete_code(code, db)
+    result = await redemption_service.delete_code(code, db)
 
-        if not result["success"]:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=result
-            )
+    if not result["success"]:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=result
+        )
 
-        return JSONResponse(content=result)
+    _invalidate_team_options_cache()
+    return ORJSONResponse(content=result)
 
-    except Exception as e:
-        logger.error(f"删除兑换码失败: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "success": False,
-                "error": f"删除失败: {str(e)}"
-            }
-        )
+
+# 导出 Excel 时的状态显示文本
+_EXPORT_STATUS_TEXT = {
+    'unused': '未使用',
+    'used': '已使用',
+    'expired': '已过期'
+}
+
+
+def _iter_file(f, chunk_size: int = 64 * 1024):
+    """分块读取已打开的文件用于 StreamingResponse，结束 (或中断) 时关闭文件"""
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
 
 
 @router.get("/codes/export")
@@ -861,23 +873,14 @@ async def export_codes(
     Returns:
         兑换码Excel文件
     """
+    tmp_path = None
     try:
-        from fastapi.responses import Response
-        from datetime import datetime
-        import xlsxwriter
-        from io import BytesIO
-
         logger.info("管理员导出兑换码为Excel")
 
-        # 获取所有兑换码 (导出不分页，传入大数量)
-        codes_result = await redemption_service.get_all_codes(db, page=1, per_page=100000, search=search)
-        all_codes = codes_result.get("codes", [])
-        
-        # 结果可能带统计信息，我们只取 codes
-
-        # 创建Excel文件到内存
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        # 写入临时文件 (constant_memory 模式按行落盘，内存占用与数据量无关)
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp_file:
+            tmp_path = tmp_file.name
+        workbook = xlsxwriter.Workbook(tmp_path, {'constant_memory': True, 'in_memory': False})
         worksheet = workbook.add_worksheet('兑换码列表')
 
         # 定义格式
@@ -910,108 +913,123 @@ async def export_codes(
         for col, header in enumerate(headers):
             worksheet.write(0, col, header, header_format)
 
-        # 写入数据
-        for row, code in enumerate(all_codes, start=1):
-            status_text = {
-                'unused': '未使用',
-                'used': '已使用',
-                'expired': '已过期'
-            }.get(code['status'], code['status'])
-
-            worksheet.write(row, 0, code['code'], cell_format)
-            worksheet.write(row, 1, status_text, cell_format)
-            worksheet.write(row, 2, code.get('created_at', '-'), cell_format)
-            worksheet.write(row, 3, code.get('expires_at', '永久有效'), cell_format)
-            worksheet.write(row, 4, code.get('used_by_email', '-'), cell_format)
-            worksheet.write(row, 5, code.get('used_at', '-'), cell_format)
-            worksheet.write(row, 6, code.get('warranty_days', '-') if code.get('has_warranty') else '-', cell_format)
-
-        # 关闭workbook
-        workbook.close()
-
-        # 获取Excel数据
-        excel_data = output.getvalue()
-        output.close()
+        # 写入数据 (从数据库流式读取，逐行写入)
+        row = 0
+        async for code in redemption_service.stream_codes(db, search=search):
+            row += 1
+            worksheet.write_row(row, 0, [
+                code.code,
+                _EXPORT_STATUS_TEXT.get(code.status, code.status),
+                code.created_at.isoformat() if code.created_at else None,
+                code.expires_at.isoformat() if code.expires_at else None,
+                code.used_by_email,
+                code.used_at.isoformat() if code.used_at else None,
+                code.warranty_days if code.has_warranty else '-'
+            ], cell_format)
+
+        # 关闭workbook (打包 xlsx 为同步 IO，放到线程中执行避免阻塞事件循环)
+        await asyncio.to_thread(workbook.close)
 
         # 生成文件名
         filename = f"redemption_codes_{get_now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
-        # 返回Excel文件
-        return Response(
-            content=excel_data,
+        # 流式返回Excel文件: 打开后立即删除临时文件路径，内容通过已打开的文件句柄读取，
+        # 客户端中途断开或响应未发送时文件也不会遗留在磁盘上
+        file_size = os.path.getsize(tmp_path)
+        export_file = open(tmp_path, "rb")
+        os.remove(tmp_path)
+        tmp_path = None
+        response = StreamingResponse(
+            _iter_file(export_file),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(file_size)
             }
         )
+        return response
 
-    except Exception as e:
-        logger.error(f"导出兑换码失败: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"导出失败: {str(e)}"
-        )
+    finally:
+        # 生成过程中出错或被取消 (如 workbook.close 失败、客户端断开) 时清理临时文件，
+        # 异常交给 AdminRoute 记录并返回 500
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
-@router.post("/codes/bulk-delete")
+@router.post(
+    "/codes/bulk-delete",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": BulkCodeDeleteRequest.model_json_schema()}}
+        }
+    }
+)
 async def bulk_delete_codes(
-    delete_data: BulkCodeDeleteRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(require_admin)
+    current_user: dict = Depends(require_admin),
+    delete_data: BulkCodeDeleteRequest = Depends(parse_bulk_code_delete_request),
+    db: AsyncSession = Depends(get_db)
 ):
     """批量删除兑换码（仅未使用可删除）"""
-    try:
-        from sqlalchemy import select
-        from app.models import RedemptionCode
-
-        codes = [c.strip() for c in (delete_data.codes or []) if c and c.strip()]
-        # 去重但保持顺序
-        seen = set()
-        codes = [c for c in codes if not (c in seen or seen.add(c))]
-
-        if not codes:
-            return JSONResponse(content={"success": True, "deleted": 0, "skipped": [], "not_found": []})
-
-        stmt = select(RedemptionCode).where(RedemptionCode.code.in_(codes))
-        result = await db.execute(stmt)
-        objs = {obj.code: obj for obj in result.scalars().all()}
-
-        deleted = []
-        skipped = []
-        not_found = []
-
-        for code in codes:
-            obj = objs.get(code)
-            if not obj:
-                not_found.append(code)
-                continue
-            if obj.status != "unused":
-                skipped.append({"code": code, "reason": f"状态为 {obj.status}，不可删除"})
-                continue
-
-            await db.delete(obj)
-            deleted.append(code)
-
+    # 去重但保持顺序
+    codes = list(dict.fromkeys(c.strip() for c in (delete_data.codes or []) if c and c.strip()))
+
+    if not codes:
+        return ORJSONResponse(content={"success": True, "deleted": 0, "skipped": [], "not_found": []})
+
+    # 一次 IN 查询预取状态 (只取需要的两列，不构造 ORM 对象)
+    stmt = select(RedemptionCode.code, RedemptionCode.status).where(RedemptionCode.code.in_(codes))
+    result = await db.execute(stmt)
+    status_map = dict(result.all())
+
+    deleted = []
+    skipped = []
+    not_found = []
+
+    for code in codes:
+        if code not in status_map:
+            not_found.append(code)
+            continue
+        code_status = status_map[code]
+        if code_status != "unused":
+            skipped.append({"code": code, "reason": f"状态为 {code_status}，不可删除"})
+            continue
+
+        deleted.append(code)
+
+    # 一条 DELETE 语句批量删除 (再次限定 unused，避免与并发兑换冲突)
+    if deleted:
+        await db.execute(
+            delete(RedemptionCode).where(
+                RedemptionCode.code.in_(deleted),
+                RedemptionCode.status == "unused"
+            ).execution_options(synchronize_session=False)
+        )
         await db.commit()
+        _invalidate_team_options_cache()
+
+    return ORJSONResponse(
+        content={
+            "success": True,
+            "deleted": len(deleted),
+            "deleted_codes": deleted,
+            "skipped": skipped,
+            "not_found": not_found,
+            "error": None
+        }
+    )
 
-        return JSONResponse(
-            content={
-                "success": True,
-                "deleted": len(deleted),
-                "deleted_codes": deleted,
-                "skipped": skipped,
-                "not_found": not_found,
-                "error": None
-            }
-        )
 
-    except Exception as e:
-        logger.error(f"批量删除兑换码失败: {e}")
-        await db.rollback()
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"success": False, "error": str(e)}
-        )
+def _parse_date_param(value: Optional[str]) -> Optional[date]:
+    """解析 YYYY-MM-DD 格式的日期查询参数，为空或格式无效时返回 None"""
+    # 先做长度/分隔符检查，格式明显不符时直接返回，不走异常流程
+    if not value or len(value) != 10 or value[4] != "-" or value[7] != "-":
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        # 含非数字字符或数值越界 (如 13 月)
+        return None
 
 
 @router.get("/records", response_class=HTMLResponse)
@@ -1023,6 +1041,7 @@ async def records_page(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     page: Optional[str] = "1",
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
@@ -1037,6 +1056,7 @@ async def records_page(
         start_date: 开始日期
         end_date: 结束日期
         page: 页码
+        cursor: 分页游标 (下一页链接携带，使用 keyset 分页)
         db: 数据库会话
         current_user: 当前用户（需要登录）
 
@@ -1044,10 +1064,6 @@ async def records_page(
         使用记录页面 HTML
     """
     try:
-        from app.main import templates
-        from datetime import datetime, timedelta
-        import math
-
         # 解析参数
         try:
             actual_team_id = int(team_id) if team_id and team_id.strip() else None
@@ -1059,96 +1075,51 @@ async def records_page(
         except (ValueError, TypeError):
             page_int = 1
             
-        logger.info(f"管理员访问使用记录页面 (page={page_int})")
+        logger.info("管理员访问使用记录页面 (page=%s)", page_int)
+
+        # 日期参数只解析一次，格式无效时忽略该条件
+        start = _parse_date_param(start_date)
+        end = _parse_date_param(end_date)
+
+        # 计算统计数据 (数据库单次聚合查询)
+        today_start, week_start, month_start = get_period_starts(get_now().date())
 
-        # 获取记录 (支持邮箱、兑换码、Team ID 筛选)
+        stats = await redemption_service.get_record_stats(
+            db,
+            today_start,
+            week_start,
+            month_start,
+            email=email,
+            code=code,
+            team_id=actual_team_id,
+            start_date=start,
+            end_date=end
+        )
+
+        # 获取记录 (筛选与分页均在数据库中完成，Team 名称由 JOIN 一并返回)
+        # 总数复用统计查询的 total，不再重复 COUNT
+        per_page = 20
         records_result = await redemption_service.get_all_records(
             db, 
             email=email, 
             code=code, 
-            team_id=actual_team_id
+            team_id=actual_team_id,
+            start_date=start,
+            end_date=end,
+            page=page_int,
+            per_page=per_page,
+            cursor=cursor,
+            total=stats["total"]
         )
-        all_records = records_result.get("records", [])
-
-        # 仅由于日期范围筛选目前还在内存中处理，如果未来记录数极大可以移至数据库
-        filtered_records = []
-        for record in all_records:
-            # 日期范围筛选
-            if start_date or end_date:
-                try:
-                    record_date = datetime.fromisoformat(record["redeemed_at"]).date()
-
-                    if start_date:
-                        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                        if record_date < start:
-                            continue
-
-                    if end_date:
-                        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                        if record_date > end:
-                            continue
-                except:
-                    pass
-
-            filtered_records.append(record)
-
-        # 获取Team信息并关联到记录
-        teams_result = await team_service.get_all_teams(db)
-        teams = teams_result.get("teams", [])
-        team_map = {team["id"]: team for team in teams}
-
-        # 为记录添加Team名称
-        for record in filtered_records:
-            team = team_map.get(record["team_id"])
-            record["team_name"] = team["team_name"] if team else None
-
-        # 计算统计数据
-        now = get_now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start = today_start - timedelta(days=today_start.weekday())
-        month_start = today_start.replace(day=1)
-
-        stats = {
-            "total": len(filtered_records),
-            "today": 0,
-            "this_week": 0,
-            "this_month": 0
-        }
+        paginated_records = records_result.get("records", [])
+        total_records = records_result.get("total", 0)
+        total_pages = records_result.get("total_pages", 1)
+        page_int = records_result.get("current_page", 1)
 
-        for record in filtered_records:
-            try:
-                record_time = datetime.fromisoformat(record["redeemed_at"])
-                if record_time >= today_start:
-                    stats["today"] += 1
-                if record_time >= week_start:
-                    stats["this_week"] += 1
-                if record_time >= month_start:
-                    stats["this_month"] += 1
-            except:
-                pass
-
-        # 分页
-        per_page = 20
-        total_records = len(filtered_records)
-        total_pages = math.ceil(total_records / per_page) if total_records > 0 else 1
-
-        # 确保页码有效
-        if page_int < 1:
-            page_int = 1
-        if page_int > total_pages:
-            page_int = total_pages
-
-        start_idx = (page_int - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_records = filtered_records[start_idx:end_idx]
-
-        # 格式化时间
+        # 格式化时间 (服务层返回 datetime 对象，无需再解析)
         for record in paginated_records:
-            try:
-                dt = datetime.fromisoformat(record["redeemed_at"])
-                record["redeemed_at"] = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except:
-                pass
+            if record["redeemed_at"]:
+                record["redeemed_at"] = record["redeemed_at"].strftime("%Y-%m-%d %H:%M:%S")
 
         return templates.TemplateResponse(
             "admin/records/index.html",
@@ -1169,13 +1140,14 @@ async def records_page(
                     "current_page": page_int,
                     "total_pages": total_pages,
                     "total": total_records,
-                    "per_page": per_page
+                    "per_page": per_page,
+                    "next_cursor": records_result.get("next_cursor")
                 }
             }
         )
 
     except Exception as e:
-        logger.error(f"获取使用记录失败: {e}")
+        logger.error("获取使用记录失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取使用记录失败: {str(e)}"
@@ -1200,20 +1172,21 @@ async def withdraw_record(
         结果 JSON
     """
     try:
-        logger.info(f"管理员请求撤回记录: {record_id}")
+        logger.info("管理员请求撤回记录: %s", record_id)
         result = await redemption_service.withdraw_record(record_id, db)
 
         if not result["success"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content=result
             )
 
-        return JSONResponse(content=result)
+        _invalidate_team_options_cache()
+        return ORJSONResponse(content=result)
 
     except Exception as e:
-        logger.error(f"撤回记录失败: {e}")
-        return JSONResponse(
+        logger.error("撤回记录失败: %s", e)
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "success": False,
@@ -1222,6 +1195,25 @@ async def withdraw_record(
         )
 
 
+# 系统设置页面数据缓存: 本进程内的设置更新接口会立即清空；
+# 其它途径 (其它 worker / 直接调用 settings_service) 的修改在 TTL 内生效
+SETTINGS_PAGE_CACHE_TTL = 30
+_settings_page_cache: Dict[str, Any] = {"values": None, "time": 0.0}
+
+
+def _get_cached_settings_page() -> Optional[Dict[str, Any]]:
+    """获取未过期的系统设置页面缓存"""
+    if time.monotonic() - _settings_page_cache["time"] < SETTINGS_PAGE_CACHE_TTL:
+        return _settings_page_cache["values"]
+    return None
+
+
+def _invalidate_settings_page_cache():
+    """使系统设置页面缓存失效"""
+    _settings_page_cache["values"] = None
+    _settings_page_cache["time"] = 0.0
+
+
 @router.get("/settings", response_class=HTMLResponse)
 async def settings_page(
     request: Request,
@@ -1240,14 +1232,21 @@ async def settings_page(
         系统设置页面 HTML
     """
     try:
-        from app.main import templates
-        from app.services.settings import settings_service
-
         logger.info("管理员访问系统设置页面")
 
-        # 获取当前配置
-        flaresolverr_config = await settings_service.get_flaresolverr_config(db)
-        log_level = await settings_service.get_log_level(db)
+        # 获取当前配置 (进程内缓存，配置更新后或 TTL 到期后失效)
+        page_values = _get_cached_settings_page()
+        if page_values is None:
+            # 缓存过期时直接从数据库一次性读取全部配置 (同时刷新 settings_service 的缓存)，
+            # 而不是读 settings_service 中可能已过期的单项缓存
+            all_settings = await settings_service.get_all_settings(db)
+            page_values = {
+                "flaresolverr_enabled": all_settings.get("flaresolverr_enabled", "false").lower() == "true",
+                "flaresolverr_url": all_settings.get("flaresolverr_url", ""),
+                "log_level": all_settings.get("log_level", "INFO")
+            }
+            _settings_page_cache["values"] = page_values
+            _settings_page_cache["time"] = time.monotonic()
 
         return templates.TemplateResponse(
             "admin/settings/index.html",
@@ -1255,14 +1254,12 @@ async def settings_page(
                 "request": request,
                 "user": current_user,
                 "active_page": "settings",
-                "flaresolverr_enabled": flaresolverr_config["enabled"],
-                "flaresolverr_url": flaresolverr_config["url"],
-                "log_level": log_level
+                **page_values
             }
         )
 
     except Exception as e:
-        logger.error(f"获取系统设置失败: {e}")
+        logger.error("获取系统设置失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取系统设置失败: {str(e)}"
@@ -1298,24 +1295,23 @@ async def update_log_level(
         更新结果
     """
     try:
-        from app.services.settings import settings_service
-
-        logger.info(f"管理员更新日志级别: {log_data.level}")
+        logger.info("管理员更新日志级别: %s", log_data.level)
 
         # 更新日志级别
         success = await settings_service.update_log_level(db, log_data.level)
 
         if success:
-            return JSONResponse(content={"success": True, "message": "日志级别已保存"})
+            _invalidate_settings_page_cache()
+            return ORJSONResponse(content={"success": True, "message": "日志级别已保存"})
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"success": False, "error": "无效的日志级别"}
             )
 
     except Exception as e:
-        logger.error(f"更新日志级别失败: {e}")
-        return JSONResponse(
+        logger.error("更新日志级别失败: %s", e)
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"success": False, "error": f"更新失败: {str(e)}"}
         )
@@ -1339,15 +1335,13 @@ async def update_flaresolverr_config(
         更新结果
     """
     try:
-        from app.services.settings import settings_service
-
-        logger.info(f"管理员更新 FlareSolverr 配置: enabled={config_data.enabled}, url={config_data.url}")
+        logger.info("管理员更新 FlareSolverr 配置: enabled=%s, url=%s", config_data.enabled, config_data.url)
 
         # 验证 URL 格式
         if config_data.enabled and config_data.url:
             url = config_data.url.strip()
             if not (url.startswith("http://") or url.startswith("https://")):
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     content={
                         "success": False,
@@ -1363,20 +1357,21 @@ async def update_flaresolverr_config(
         )
 
         if success:
+            _invalidate_settings_page_cache()
+
             # 清理 ChatGPT 服务的会话和 CF cookies 缓存
-            from app.services.chatgpt import chatgpt_service
             await chatgpt_service.clear_session()
 
-            return JSONResponse(content={"success": True, "message": "FlareSolverr 配置已保存"})
+            return ORJSONResponse(content={"success": True, "message": "FlareSolverr 配置已保存"})
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"success": False, "error": "保存失败"}
             )
 
     except Exception as e:
-        logger.error(f"更新 FlareSolverr 配置失败: {e}")
-        return JSONResponse(
+        logger.error("更新 FlareSolverr 配置失败: %s", e)
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"success": False, "error": f"更新失败: {str(e)}"}
         )
@@ -3,53 +3,159 @@ ChatGPT API 服务
 用于调用 ChatGPT 后端 API,实现 Team 成员管理功能
 """
 import asyncio
+import functools
+import itertools
 import logging
+import random
+import re
 import time
-from typing import Optional, Dict, Any, List
+from collections import ChainMap, OrderedDict
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Set, Tuple, Union
+import orjson
 from curl_cffi.requests import AsyncSession
+from app.database import AsyncSessionLocal
 from app.services.settings import settings_service
 from sqlalchemy.ext.asyncio import AsyncSession as DBAsyncSession
 
 logger = logging.getLogger(__name__)
 
+# 通用请求头常量 (只读)
+_JSON_HEADERS: Mapping[str, str] = MappingProxyType({"Content-Type": "application/json"})
+_DEFAULT_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# HTML / Cloudflare 验证页检测只扫描响应体前缀，避免对整页内容做 lower() 和多次子串扫描
+_HTML_SCAN_LIMIT = 1024
+_CF_SCAN_LIMIT = 32 * 1024
+_CF_MARKERS = r"cdn-cgi/challenge-platform|_cf_chl_opt|cf-chl|enable javascript and cookies to continue"
+_CF_MARKERS_RE = re.compile(_CF_MARKERS, re.IGNORECASE)
+_CF_MARKERS_BYTES_RE = re.compile(_CF_MARKERS.encode(), re.IGNORECASE)
+
+# 错误响应体最多读取的字节数 (错误提示最终也只保留 2000 字符)
+_ERROR_BODY_LIMIT = 8192
+
+
+@functools.lru_cache(maxsize=1024)
+def _bearer(token: str) -> str:
+    """Authorization 头的值 (按 token 缓存)"""
+    return f"Bearer {token}"
+
 
 class ChatGPTService:
     """ChatGPT API 服务类"""
 
     BASE_URL = "https://chatgpt.com/backend-api"
 
+    # 各接口 URL 模板 (类创建时拼接一次，调用时按位置 format)
+    INVITES_URL = BASE_URL + "/accounts/{}/invites"
+    USERS_URL = BASE_URL + "/accounts/{}/users"
+    USER_URL = BASE_URL + "/accounts/{}/users/{}"
+    ACCOUNT_CHECK_URL = BASE_URL + "/accounts/check/v4-2023-04-27"
+    SESSION_URL = "https://chatgpt.com/api/auth/session"
+    OAUTH_TOKEN_URL = "https://auth.openai.com/oauth/token"
+
     # 重试配置
     MAX_RETRIES = 3
-    RETRY_DELAYS = [1, 2, 4]  # 指数退避: 1s, 2s, 4s
+    # 指数退避 (带随机抖动，避免并发请求同时重试): min(1s * 2^n, 30s) + [0, 0.5s)
+    BASE_DELAY = 1.0
+    MAX_DELAY = 30.0
+    JITTER = 0.5
+
+    # 获取成员列表时分页请求的最大并发数
+    MEMBERS_PAGE_CONCURRENCY = 8
+
+    # HTTP 会话池大小 (请求按轮询分配到各会话，减少并发请求在单连接上排队)
+    POOL_SIZE = 4
 
-    # FlareSolverr CF cookies 缓存时间 (30 分钟)
+    # 预构建请求头缓存的最大条目数 (按 access_token + account_id 缓存)
+    HEADERS_CACHE_SIZE = 256
+
+    # FlareSolverr CF cookies 缓存时间: 初始 30 分钟，按实际情况自适应
+    # - 遇到 CF 验证时减半 (不低于 5 分钟)
+    # - 使用 cookies 的请求成功时增长 10% (不超过 2 小时)
     CF_COOKIE_TTL = 1800
+    CF_COOKIE_MIN_TTL = 300
+    CF_COOKIE_MAX_TTL = 7200
+
+    # FlareSolverr 调用总时长上限 (秒)，超时即视为获取失败，避免长时间阻塞等待 cookies 的请求
+    FLARESOLVERR_TIMEOUT = 75
 
     def __init__(self):
         """初始化 ChatGPT API 服务"""
-        self.session: Optional[AsyncSession] = None
+        self._sessions: List[AsyncSession] = []
+        self._session_rr = itertools.count()
+        # 会话租用计数: 正在使用的会话在关闭时先移出池，待最后一个请求归还后再关闭
+        self._session_leases: Dict[AsyncSession, int] = {}
+        self._retired_sessions: Set[AsyncSession] = set()
         self._cf_cookies: Optional[Dict[str, str]] = None
         self._cf_user_agent: Optional[str] = None
         self._cf_cookies_time: float = 0
+        self._cf_ttl: float = self.CF_COOKIE_TTL
+        # 是否已从数据库加载过持久化的 CF cookies
+        self._cf_state_loaded = False
+        self._cf_state_save_task: Optional[asyncio.Task] = None
+        # 串行化 CF cookies 获取/恢复，避免并发请求同时调用 FlareSolverr
+        self._cf_lock = asyncio.Lock()
+        self._headers_cache: "OrderedDict[tuple, Mapping[str, str]]" = OrderedDict()
+
+    def _headers_for(
+        self,
+        access_token: str,
+        account_id: Optional[str] = None,
+        *,
+        json_body: bool = False
+    ) -> Mapping[str, str]:
+        """
+        获取预构建的只读请求头 (LRU 缓存)，避免分页/批量请求时重复拼接
+
+        Args:
+            access_token: AT Token
+            account_id: Account ID (为空时不带 chatgpt-account-id)
+            json_body: 是否带 Content-Type: application/json
+        """
+        key = (access_token, account_id, json_body)
+        headers = self._headers_cache.get(key)
+        if headers is not None:
+            self._headers_cache.move_to_end(key)
+            return headers
+
+        raw = {**_JSON_HEADERS} if json_body else {}
+        raw["Authorization"] = _bearer(access_token)
+        if account_id:
+            raw["chatgpt-account-id"] = account_id
+
+        headers = MappingProxyType(raw)
+        self._headers_cache[key] = headers
+        if len(self._headers_cache) > self.HEADERS_CACHE_SIZE:
+            self._headers_cache.popitem(last=False)
+        return headers
 
     @staticmethod
-    def _looks_like_html(text: Optional[str]) -> bool:
+    def _looks_like_html(text: Optional[Union[str, bytes]]) -> bool:
         if not text:
             return False
-        stripped = text.lstrip().lower()
-        return stripped.startswith("<!doctype html") or stripped.startswith("<html") or "<html" in stripped[:200]
+        stripped = text[:_HTML_SCAN_LIMIT].lstrip()[:200].lower()
+        if isinstance(stripped, bytes):
+            return stripped.startswith(b"<!doctype html") or b"<html" in stripped
+        return stripped.startswith("<!doctype html") or "<html" in stripped
 
     @staticmethod
-    def _is_cloudflare_challenge(text: Optional[str]) -> bool:
+    def _is_cloudflare_challenge(text: Optional[Union[str, bytes]]) -> bool:
         if not text:
             return False
-        lowered = text.lower()
-        return (
-            "cdn-cgi/challenge-platform" in lowered
-            or "_cf_chl_opt" in lowered
-            or "cf-chl" in lowered
-            or "enable javascript and cookies to continue" in lowered
-        )
+        pattern = _CF_MARKERS_BYTES_RE if isinstance(text, bytes) else _CF_MARKERS_RE
+        return pattern.search(text, 0, _CF_SCAN_LIMIT) is not None
+
+    @staticmethod
+    def _parse_json(response: Any) -> Any:
+        """直接从响应字节解析 JSON (orjson)，解析失败抛出 ValueError"""
+        return orjson.loads(response.content)
+
+    @staticmethod
+    def _read_error_body(response: Any, limit: int = _ERROR_BODY_LIMIT) -> str:
+        """只解码错误响应体的前 limit 字节，避免对整页 HTML 做完整解码"""
+        raw = (response.content or b"")[:limit]
+        return raw.decode("utf-8", errors="replace")
 
     @classmethod
     def _simplify_error_text(cls, text: Optional[str]) -> Dict[str, Optional[str]]:
@@ -82,6 +188,24 @@ class ChatGPTService:
             trimmed = trimmed[:2000] + "...(已截断)"
         return {"message": trimmed, "code": None}
 
+    @classmethod
+    def _retry_delay(cls, attempt: int, response: Any = None) -> float:
+        """
+        计算第 attempt 次失败后的重试等待时间
+
+        若响应带有 Retry-After (秒数)，则等待时间不少于该值 (同样受 MAX_DELAY 限制)
+        """
+        delay = min(cls.BASE_DELAY * (2 ** attempt), cls.MAX_DELAY) + random.uniform(0, cls.JITTER)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    delay = max(delay, min(float(retry_after), cls.MAX_DELAY))
+                except ValueError:
+                    # HTTP-date 格式的 Retry-After 忽略，使用退避时间
+                    pass
+        return delay
+
     async def _fetch_cf_cookies(self, db_session: DBAsyncSession) -> bool:
         """
         通过 FlareSolverr 获取 Cloudflare 验证 cookies
@@ -100,19 +224,22 @@ class ChatGPTService:
         logger.info(f"通过 FlareSolverr 获取 CF cookies: {flaresolverr_url}")
 
         try:
-            async with AsyncSession(timeout=120) as fs_session:
-                response = await fs_session.post(
-                    flaresolverr_url,
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "cmd": "request.get",
-                        "url": "https://chatgpt.com",
-                        "maxTimeout": 60000
-                    }
+            async with AsyncSession(timeout=70) as fs_session:
+                response = await asyncio.wait_for(
+                    fs_session.post(
+                        flaresolverr_url,
+                        headers=_JSON_HEADERS,
+                        data=orjson.dumps({
+                            "cmd": "request.get",
+                            "url": "https://chatgpt.com",
+                            "maxTimeout": 60000
+                        })
+                    ),
+                    timeout=self.FLARESOLVERR_TIMEOUT
                 )
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = self._parse_json(response)
                     if data.get("status") == "ok":
                         solution = data.get("solution", {})
                         cookies_list = solution.get("cookies", [])
@@ -123,54 +250,126 @@ class ChatGPTService:
                         self._cf_cookies_time = time.time()
 
                         logger.info(f"FlareSolverr 成功: 获取 {len(self._cf_cookies)} 个 cookies")
+                        self._schedule_cf_state_save()
                         return True
                     else:
                         logger.warning(f"FlareSolverr 失败: {data.get('message', '未知错误')}")
                 else:
                     logger.warning(f"FlareSolverr HTTP 错误: {response.status_code}")
 
+        except asyncio.TimeoutError:
+            logger.warning(f"FlareSolverr 请求超时 ({self.FLARESOLVERR_TIMEOUT}s)")
         except Exception as e:
             logger.error(f"FlareSolverr 异常: {e}")
 
         return False
 
+    def _schedule_cf_state_save(self):
+        """
+        后台持久化当前 CF cookies
+
+        使用独立的数据库会话且不等待完成，避免提交/回滚调用方的事务，
+        也避免 SQLite 写锁被调用方持有时阻塞当前请求
+        """
+        cookies, user_agent, ts, ttl = dict(self._cf_cookies), self._cf_user_agent, self._cf_cookies_time, self._cf_ttl
+
+        async def save():
+            try:
+                async with AsyncSessionLocal() as session:
+                    await settings_service.save_cf_state(session, cookies, user_agent, ts, ttl)
+            except Exception as e:
+                logger.warning(f"保存 CF cookies 状态失败: {e}")
+
+        self._cf_state_save_task = asyncio.create_task(save())
+
+    async def _ensure_cf_state_loaded(self, db_session: Optional[DBAsyncSession]):
+        """
+        首次使用时从数据库加载持久化的 CF cookies
+
+        仅在 FlareSolverr 已启用且已配置、且 cookies 仍处于保存时的 TTL 内时采用。
+        在 _cf_lock 内加载并二次检查，只加载一次；使用独立的数据库会话，
+        避免并发请求共用调用方的会话 (AsyncSession 不支持并发操作)
+        """
+        if self._cf_state_loaded or db_session is None:
+            return
+
+        async with self._cf_lock:
+            if self._cf_state_loaded:
+                return
+
+            try:
+                async with AsyncSessionLocal() as session:
+                    config = await settings_service.get_flaresolverr_config(session)
+                    state = None
+                    if config["enabled"] and config["url"]:
+                        state = await settings_service.load_cf_state(session)
+            except Exception as e:
+                logger.warning(f"加载 CF cookies 状态失败: {e}")
+                state = None
+            self._cf_state_loaded = True
+
+            if not state or self._cf_cookies:
+                return
+
+            ts = float(state.get("ts") or 0)
+            # 使用保存时的 TTL (旧格式无该字段时使用当前 TTL)
+            ttl = min(self.CF_COOKIE_MAX_TTL, max(self.CF_COOKIE_MIN_TTL, float(state.get("ttl") or self._cf_ttl)))
+            if time.time() - ts < ttl:
+                self._cf_cookies = state["cookies"]
+                self._cf_user_agent = state.get("user_agent") or None
+                self._cf_cookies_time = ts
+                self._cf_ttl = ttl
+                logger.info(f"已加载持久化的 CF cookies: {len(self._cf_cookies)} 个")
+
     def _cf_cookies_valid(self) -> bool:
         """检查 CF cookies 缓存是否仍然有效"""
-        return bool(self._cf_cookies) and (time.time() - self._cf_cookies_time) < self.CF_COOKIE_TTL
+        return bool(self._cf_cookies) and (time.time() - self._cf_cookies_time) < self._cf_ttl
 
     async def _ensure_cf_cookies(self, db_session: DBAsyncSession):
         """确保有有效的 CF cookies (如果 FlareSolverr 已配置)"""
-        if not self._cf_cookies_valid():
-            await self._fetch_cf_cookies(db_session)
-
-    async def _try_cf_recovery(self, db_session: DBAsyncSession) -> bool:
+        await self._ensure_cf_state_loaded(db_session)
+        if self._cf_cookies_valid():
+            return
+        async with self._cf_lock:
+            # 等锁期间可能已被其它协程获取
+            if not self._cf_cookies_valid():
+                await self._fetch_cf_cookies(db_session)
+
+    async def _try_cf_recovery(self, db_session: DBAsyncSession, since: float = 0) -> bool:
         """
         CF 验证失败后,尝试通过 FlareSolverr 重新获取 cookies 并重建会话
 
+        Args:
+            db_session: 数据库会话
+            since: 失败请求的发送时间；若在此之后已有其它协程完成恢复，则直接复用
+
         Returns:
             是否恢复成功
         """
-        logger.info("检测到 Cloudflare 验证,尝试通过 FlareSolverr 恢复...")
+        async with self._cf_lock:
+            if self._cf_cookies_valid() and self._cf_cookies_time > since:
+                logger.info("CF cookies 已由其它请求刷新,直接重试")
+                return True
 
-        # 清除缓存
-        self._cf_cookies = None
-        self._cf_user_agent = None
-        self._cf_cookies_time = 0
+            logger.info("检测到 Cloudflare 验证,尝试通过 FlareSolverr 恢复...")
 
-        # 重新获取 cookies
-        success = await self._fetch_cf_cookies(db_session)
-        if success:
-            # 重建 session
-            if self.session:
-                try:
-                    await self.session.close()
-                except Exception:
-                    pass
-                self.session = None
-            self.session = await self._create_session(db_session)
-            return True
+            # cookies 在 TTL 内失效，缩短后续缓存时间
+            self._cf_ttl = max(self.CF_COOKIE_MIN_TTL, self._cf_ttl / 2)
 
-        return False
+            # 清除缓存
+            self._cf_cookies = None
+            self._cf_user_agent = None
+            self._cf_cookies_time = 0
+
+            # 重新获取 cookies
+            success = await self._fetch_cf_cookies(db_session)
+            if success:
+                # 直接更新池中会话的 cookies (不关闭会话，其它协程可能正在使用)
+                for session in dict.fromkeys(self._sessions):
+                    self._apply_cf_cookies(session)
+                return True
+
+            return False
 
     async def _create_session(self, db_session: DBAsyncSession) -> AsyncSession:
         """
@@ -184,113 +383,227 @@ class ChatGPTService:
         """
         # 如果 FlareSolverr 已配置,确保有 CF cookies
         await self._ensure_cf_cookies(db_session)
+        return self._build_session()
 
-        # 创建会话 (使用 chrome 浏览器指纹)
+    def _build_session(self) -> AsyncSession:
+        """使用当前 CF cookies 构建 curl_cffi 会话 (使用 chrome 浏览器指纹)"""
         session = AsyncSession(
             impersonate="chrome",
             timeout=30
         )
 
-        # 应用 CF cookies 到会话
+        self._apply_cf_cookies(session)
+
+        logger.info("创建 HTTP 会话")
+        return session
+
+    def _apply_cf_cookies(self, session: AsyncSession):
+        """应用当前 CF cookies 到会话 (同名 cookie 直接覆盖)"""
         if self._cf_cookies:
             for name, value in self._cf_cookies.items():
                 session.cookies.set(name, value, domain="chatgpt.com")
             logger.info(f"已应用 {len(self._cf_cookies)} 个 CF cookies 到会话")
 
-        logger.info("创建 HTTP 会话")
-        return session
+    async def _get_session(self, db_session: Optional[DBAsyncSession]) -> AsyncSession:
+        """
+        从会话池中获取会话 (轮询)，池未满时按需创建
+
+        Args:
+            db_session: 数据库会话
+
+        Returns:
+            curl_cffi AsyncSession 实例
+        """
+        if len(self._sessions) < self.POOL_SIZE:
+            session = await self._create_session(db_session)
+            # 创建期间可能已被其它协程填满
+            if len(self._sessions) < self.POOL_SIZE:
+                self._sessions.append(session)
+                return session
+            await session.close()
+
+        return self._sessions[next(self._session_rr) % len(self._sessions)]
+
+    async def _close_sessions(self):
+        """
+        关闭会话池中的所有会话
+
+        会话先整体移出池 (后续请求使用新建的会话)；仍有请求在使用的会话
+        延后到归还时再关闭，避免中断进行中的请求
+        """
+        sessions, self._sessions = self._sessions, []
+        for session in dict.fromkeys(sessions):
+            if self._session_leases.get(session):
+                self._retired_sessions.add(session)
+            else:
+                await self._close_session(session)
+
+    async def _release_session(self, session: AsyncSession):
+        """归还会话；已移出池且无其它请求使用时关闭"""
+        leases = self._session_leases.get(session, 0) - 1
+        if leases > 0:
+            self._session_leases[session] = leases
+            return
+        self._session_leases.pop(session, None)
+        if session in self._retired_sessions:
+            self._retired_sessions.discard(session)
+            await self._close_session(session)
+
+    @staticmethod
+    async def _close_session(session: AsyncSession):
+        """关闭单个会话 (忽略关闭时的异常)"""
+        try:
+            await session.close()
+        except Exception:
+            pass
+
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        payload: Optional[bytes],
+        params: Optional[Dict[str, Any]],
+        db_session: Optional[DBAsyncSession]
+    ) -> Tuple[Any, float]:
+        """
+        发送一次 HTTP 请求 (不处理响应)
+
+        Returns:
+            (响应对象, 请求发送时间)
+        """
+        # 如果有 FlareSolverr 的 User-Agent,覆盖请求头 (不复制原请求头)
+        request_headers = headers
+        if self._cf_user_agent:
+            request_headers = ChainMap({"User-Agent": self._cf_user_agent}, headers)
+
+        # 每次请求重新取会话，CF 恢复后会使用新会话；请求期间持有租用，防止会话被关闭
+        session = await self._get_session(db_session)
+        self._session_leases[session] = self._session_leases.get(session, 0) + 1
+        try:
+            request_started = time.time()
+            if method == "GET":
+                response = await session.get(url, headers=request_headers, params=params)
+            elif method == "POST":
+                response = await session.post(url, headers=request_headers, data=payload)
+            elif method == "DELETE":
+                response = await session.delete(url, headers=request_headers, data=payload)
+            else:
+                raise ValueError(f"不支持的 HTTP 方法: {method}")
+        finally:
+            await self._release_session(session)
+
+        logger.debug("响应状态码: %s", response.status_code)
+        return response, request_started
+
+    def _json_success(self, response: Any) -> Optional[Dict[str, Any]]:
+        """2xx 且为合法 JSON 时返回成功结果，否则返回 None (交给完整的错误处理)"""
+        status_code = response.status_code
+        if not 200 <= status_code < 300:
+            return None
+        # 仅 content-type 为 JSON 时解析，其它内容 (HTML/文本) 直接按错误处理
+        if "application/json" not in (response.headers.get("content-type") or "").lower():
+            return None
+        try:
+            data = self._parse_json(response)
+        except ValueError:
+            return None
+
+        if self._cf_cookies:
+            # cookies 仍然有效，逐步延长缓存时间
+            self._cf_ttl = min(self.CF_COOKIE_MAX_TTL, self._cf_ttl * 1.1)
+        return {
+            "success": True,
+            "status_code": status_code,
+            "data": data,
+            "error": None
+        }
 
     async def _make_request(
         self,
         method: str,
         url: str,
-        headers: Dict[str, str],
+        headers: Mapping[str, str],
         json_data: Optional[Dict[str, Any]] = None,
-        db_session: Optional[DBAsyncSession] = None
+        db_session: Optional[DBAsyncSession] = None,
+        params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         发送 HTTP 请求 (带重试机制)
 
+        首次请求成功 (2xx JSON) 时直接返回，只有失败时才进入重试流程
+
         Args:
             method: HTTP 方法 (GET/POST/DELETE)
             url: 请求 URL
             headers: 请求头
             json_data: JSON 请求体
             db_session: 数据库会话
+            params: URL 查询参数
 
         Returns:
             响应数据字典,包含 success, status_code, data, error
         """
-        # 创建会话
-        if not self.session:
-            self.session = await self._create_session(db_session)
+        # 请求体只序列化一次，重试时复用 (调用方需在 headers 中带 Content-Type)
+        payload = orjson.dumps(json_data) if json_data is not None else None
+
+        logger.debug("发送请求: %s %s", method, url)
+        try:
+            first = await self._send_request(method, url, headers, payload, params, db_session)
+        except Exception as e:
+            first = e
+        else:
+            result = self._json_success(first[0])
+            if result is not None:
+                return result
+
+        return await self._request_with_retry(method, url, headers, payload, params, db_session, first)
+
+    async def _request_with_retry(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        payload: Optional[bytes],
+        params: Optional[Dict[str, Any]],
+        db_session: Optional[DBAsyncSession],
+        first: Union[Tuple[Any, float], Exception]
+    ) -> Dict[str, Any]:
+        """
+        处理失败的响应并按需重试 (5xx/超时/异常重试，CF 验证尝试恢复)
 
+        Args:
+            first: 首次请求的结果 ((响应, 发送时间) 或抛出的异常)，作为第 1 次尝试处理
+        """
         cf_retried = False  # 标记是否已通过 FlareSolverr 重试过
+        pending: Optional[Union[Tuple[Any, float], Exception]] = first
 
         # 重试循环
         for attempt in range(self.MAX_RETRIES):
             try:
-                logger.info(f"发送请求: {method} {url} (尝试 {attempt + 1}/{self.MAX_RETRIES})")
-
-                # 如果有 FlareSolverr 的 User-Agent,覆盖请求头
-                request_headers = dict(headers)
-                if self._cf_user_agent:
-                    request_headers["User-Agent"] = self._cf_user_agent
-
-                # 发送请求
-                if method == "GET":
-                    response = await self.session.get(url, headers=request_headers)
-                elif method == "POST":
-                    response = await self.session.post(url, headers=request_headers, json=json_data)
-                elif method == "DELETE":
-                    response = await self.session.delete(url, headers=request_headers, json=json_data)
+                if pending is not None:
+                    outcome, pending = pending, None
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    response, request_started = outcome
                 else:
-                    raise ValueError(f"不支持的 HTTP 方法: {method}")
+                    logger.debug("发送请求: %s %s (尝试 %d/%d)", method, url, attempt + 1, self.MAX_RETRIES)
+                    response, request_started = await self._send_request(
+                        method, url, headers, payload, params, db_session
+                    )
+                    result = self._json_success(response)
+                    if result is not None:
+                        return result
 
                 status_code = response.status_code
-                logger.info(f"响应状态码: {status_code}")
 
-                # 2xx 成功
+                # 2xx 但不是合法 JSON (HTML/Cloudflare/重定向页面等)，视为失败
                 if 200 <= status_code < 300:
-                    # 若返回 HTML（Cloudflare/重定向页面），即便是 2xx 也应视为失败
-                    content_type = ""
-                    try:
-                        content_type = (response.headers.get("content-type") or "").lower()
-                    except Exception:
-                        content_type = ""
-
-                    is_json = "application/json" in content_type
-                    text_body = None
-
-                    if is_json:
-                        try:
-                            data = response.json()
-                            return {
-                                "success": True,
-                                "status_code": status_code,
-                                "data": data,
-                                "error": None
-                            }
-                        except Exception:
-                            text_body = response.text
-                    else:
-                        # 非 JSON 情况下尝试解析；若失败或内容像 HTML，则报错
-                        try:
-                            data = response.json()
-                            return {
-                                "success": True,
-                                "status_code": status_code,
-                                "data": data,
-                                "error": None
-                            }
-                        except Exception:
-                            text_body = response.text
-
-                    simplified = self._simplify_error_text(text_body)
+                    simplified = self._simplify_error_text(self._read_error_body(response))
 
                     # CF 验证检测: 尝试通过 FlareSolverr 恢复
                     if simplified.get("code") == "cloudflare_challenge" and not cf_retried and db_session:
-                        recovery_ok = await self._try_cf_recovery(db_session)
+                        recovery_ok = await self._try_cf_recovery(db_session, request_started)
                         if recovery_ok:
                             cf_retried = True
                             continue
@@ -308,8 +621,8 @@ class ChatGPTService:
                 if 400 <= status_code < 500:
                     error_code = None
                     try:
-                        error_data = response.json()
-                        error_msg = error_data.get("detail", response.text)
+                        error_data = self._parse_json(response)
+                        error_msg = error_data.get("detail") or self._read_error_body(response)
 
                         # 检测特定错误码
                         if isinstance(error_data, dict):
@@ -319,8 +632,9 @@ class ChatGPTService:
                                 error_code = error_info.get("code")
                             else:
                                 error_code = error_data.get("code")
-                    except Exception:
-                        error_msg = response.text
+                    except (ValueError, AttributeError):
+                        # 非 JSON 或 JSON 不是对象
+                        error_msg = self._read_error_body(response)
 
                     simplified = self._simplify_error_text(error_msg)
                     error_msg = simplified["message"]
@@ -328,7 +642,7 @@ class ChatGPTService:
 
                     # 4xx 也可能是 CF 挑战 (403)
                     if simplified.get("code") == "cloudflare_challenge" and not cf_retried and db_session:
-                        recovery_ok = await self._try_cf_recovery(db_session)
+                        recovery_ok = await self._try_cf_recovery(db_session, request_started)
                         if recovery_ok:
                             cf_retried = True
                             continue
@@ -346,20 +660,18 @@ class ChatGPTService:
                 # 5xx 服务器错误 (需要重试)
                 if status_code >= 500:
                     # Cloudflare 验证页有时会以 5xx 返回
-                    try:
-                        body_text = response.text
-                    except Exception:
-                        body_text = ""
+                    # 直接在原始字节上检测，仅在需要生成提示时才解码
+                    body = (response.content or b"")[:_ERROR_BODY_LIMIT]
 
-                    if self._looks_like_html(body_text) and self._is_cloudflare_challenge(body_text):
+                    if self._looks_like_html(body) and self._is_cloudflare_challenge(body):
                         # 尝试通过 FlareSolverr 恢复
                         if not cf_retried and db_session:
-                            recovery_ok = await self._try_cf_recovery(db_session)
+                            recovery_ok = await self._try_cf_recovery(db_session, request_started)
                             if recovery_ok:
                                 cf_retried = True
                                 continue
 
-                        simplified = self._simplify_error_text(body_text)
+                        simplified = self._simplify_error_text(body.decode("utf-8", errors="replace"))
                         logger.warning(f"服务器错误 {status_code}: {simplified['message']}")
                         return {
                             "success": False,
@@ -373,8 +685,8 @@ class ChatGPTService:
 
                     # 如果不是最后一次尝试,等待后重试
                     if attempt < self.MAX_RETRIES - 1:
-                        delay = self.RETRY_DELAYS[attempt]
-                        logger.info(f"等待 {delay}s 后重试")
+                        delay = self._retry_delay(attempt, response)
+                        logger.debug("等待 %.1fs 后重试", delay)
                         await asyncio.sleep(delay)
                         continue
 
@@ -391,8 +703,8 @@ class ChatGPTService:
 
                 # 如果不是最后一次尝试,等待后重试
                 if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAYS[attempt]
-                    logger.info(f"等待 {delay}s 后重试")
+                    delay = self._retry_delay(attempt)
+                    logger.debug("等待 %.1fs 后重试", delay)
                     await asyncio.sleep(delay)
                     continue
 
@@ -409,8 +721,8 @@ class ChatGPTService:
 
                 # 如果不是最后一次尝试,等待后重试
                 if attempt < self.MAX_RETRIES - 1:
-                    delay = self.RETRY_DELAYS[attempt]
-                    logger.info(f"等待 {delay}s 后重试")
+                    delay = self._retry_delay(attempt)
+                    logger.debug("等待 %.1fs 后重试", delay)
                     await asyncio.sleep(delay)
                     continue
 
@@ -449,13 +761,9 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, status_code, error
         """
-        url = f"{self.BASE_URL}/accounts/{account_id}/invites"
+        url = self.INVITES_URL.format(account_id)
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-            "chatgpt-account-id": account_id
-        }
+        headers = self._headers_for(access_token, account_id, json_body=True)
 
         json_data = {
             "email_addresses": [email],
@@ -494,42 +802,50 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, members (成员列表), total (总数), error
         """
-        all_members = []
-        offset = 0
         limit = 50
+        url = self.USERS_URL.format(account_id)
+        headers = self._headers_for(access_token)
 
-        while True:
-            url = f"{self.BASE_URL}/accounts/{account_id}/users?limit={limit}&offset={offset}"
+        async def fetch_page(offset: int) -> Dict[str, Any]:
+            logger.debug("获取成员列表: Team %s, offset=%d", account_id, offset)
+            return await self._make_request(
+                "GET", url, headers, db_session=db_session,
+                params={"limit": limit, "offset": offset}
+            )
 
-            headers = {
-                "Authorization": f"Bearer {access_token}"
+        def failure(result: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "success": False,
+                "members": [],
+                "total": 0,
+                "error": result["error"],
+                "error_code": result.get("error_code")
             }
 
-            logger.info(f"获取成员列表: Team {account_id}, offset={offset}")
-
-            result = await self._make_request("GET", url, headers, db_session=db_session)
-
-            if not result["success"]:
-                return {
-                    "success": False,
-                    "members": [],
-                    "total": 0,
-                    "error": result["error"],
-                    "error_code": result.get("error_code")
-                }
+        # 先取第一页拿到总数
+        result = await fetch_page(0)
+        if not result["success"]:
+            return failure(result)
 
-            # 解析响应
-            data = result["data"]
-            items = data.get("items", [])
-            total = data.get("total", 0)
+        data = result["data"]
+        all_members = list(data.get("items", []))
+        total = data.get("total", 0)
 
-            all_members.extend(items)
+        # 其余分页并发获取 (限制并发数，避免触发 CF 限流)
+        if len(all_members) < total:
+            semaphore = asyncio.Semaphore(self.MEMBERS_PAGE_CONCURRENCY)
 
-            # 检查是否还有更多成员
-            if len(all_members) >= total:
-                break
+            async def fetch_page_limited(offset: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await fetch_page(offset)
 
-            offset += limit
+            results = await asyncio.gather(
+                *(fetch_page_limited(offset) for offset in range(limit, total, limit))
+            )
+            for page_result in results:
+                if not page_result["success"]:
+                    return failure(page_result)
+                all_members.extend(page_result["data"].get("items", []))
 
         logger.info(f"获取成员列表成功: 共 {len(all_members)} 个成员")
 
@@ -557,12 +873,9 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, items (邀请列表), total (总数), error
         """
-        url = f"{self.BASE_URL}/accounts/{account_id}/invites"
+        url = self.INVITES_URL.format(account_id)
 
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "chatgpt-account-id": account_id
-        }
+        headers = self._headers_for(access_token, account_id)
 
         logger.info(f"获取邀请列表: Team {account_id}")
 
@@ -607,13 +920,9 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, status_code, error
         """
-        url = f"{self.BASE_URL}/accounts/{account_id}/invites"
+        url = self.INVITES_URL.format(account_id)
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-            "chatgpt-account-id": account_id
-        }
+        headers = self._headers_for(access_token, account_id, json_body=True)
 
         json_data = {
             "email_address": email
@@ -644,12 +953,9 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, status_code, error
         """
-        url = f"{self.BASE_URL}/accounts/{account_id}/users/{user_id}"
+        url = self.USER_URL.format(account_id, user_id)
 
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "chatgpt-account-id": account_id
-        }
+        headers = self._headers_for(access_token, account_id)
 
         logger.info(f"删除成员: {user_id} from Team {account_id}")
 
@@ -680,11 +986,9 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, accounts (账户列表), error
         """
-        url = f"{self.BASE_URL}/accounts/check/v4-2023-04-27"
+        url = self.ACCOUNT_CHECK_URL
 
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
+        headers = self._headers_for(access_token)
 
         logger.info("获取 account-id 和订阅信息")
 
@@ -702,23 +1006,23 @@ class ChatGPTService:
         data = result["data"]
         accounts_data = data.get("accounts", {})
 
-        # 提取所有 Team 类型的账户
+        # 提取所有 Team 类型的账户 (非 Team 账户直接跳过，不读取 entitlement)
         team_accounts = []
         for account_id, account_info in accounts_data.items():
             account = account_info.get("account", {})
-            entitlement = account_info.get("entitlement", {})
-
-            # 只保留 Team 类型的账户
-            if account.get("plan_type") == "team":
-                team_accounts.append({
-                    "account_id": account_id,
-                    "name": account.get("name", ""),
-                    "plan_type": account.get("plan_type", ""),
-                    "subscription_plan": entitlement.get("subscription_plan", ""),
-                    "expires_at": entitlement.get("expires_at", ""),
-                    "has_active_subscription": entitlement.get("has_active_subscription", False),
-                    "account_user_role": account.get("account_user_role", "")
-                })
+            if account.get("plan_type") != "team":
+                continue
+
+            entitlement = account_info.get("entitlement") or {}
+            team_accounts.append({
+                "account_id": account_id,
+                "name": account.get("name", ""),
+                "plan_type": "team",
+                "subscription_plan": entitlement.get("subscription_plan", ""),
+                "expires_at": entitlement.get("expires_at", ""),
+                "has_active_subscription": entitlement.get("has_active_subscription", False),
+                "account_user_role": account.get("account_user_role", "")
+            })
 
         logger.info(f"获取账户信息成功: 共 {len(team_accounts)} 个 Team 账户")
 
@@ -743,11 +1047,11 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, access_token, error
         """
-        url = "https://chatgpt.com/api/auth/session"
+        url = self.SESSION_URL
         
         headers = {
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "User-Agent": self._cf_user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            "User-Agent": self._cf_user_agent or _DEFAULT_UA
         }
 
         cookies = {
@@ -756,14 +1060,13 @@ class ChatGPTService:
 
         logger.info("使用 session_token 刷新 access_token")
 
-        if not self.session:
-            self.session = await self._create_session(db_session)
+        session = await self._get_session(db_session)
 
         try:
-            response = await self.session.get(url, headers=headers, cookies=cookies)
+            response = await session.get(url, headers=headers, cookies=cookies)
             status_code = response.status_code
             if status_code == 200:
-                data = response.json()
+                data = self._parse_json(response)
                 access_token = data.get("accessToken")
                 if access_token:
                     return {
@@ -773,9 +1076,9 @@ class ChatGPTService:
                 return {"success": False, "error": "响应中未包含 accessToken"}
             else:
                 error_code = None
-                error_msg = response.text
+                error_msg = self._read_error_body(response)
                 try:
-                    error_data = response.json()
+                    error_data = self._parse_json(response)
                     error_msg = error_data.get("detail", error_msg)
                     if isinstance(error_data, dict):
                         error_info = error_data.get("error")
@@ -783,7 +1086,7 @@ class ChatGPTService:
                             error_code = error_info.get("code")
                         else:
                             error_code = error_data.get("code")
-                except Exception:
+                except (ValueError, AttributeError):
                     pass
                 
                 logger.warning(f"session_token 刷新失败 {status_code}: {error_msg} (code: {error_code})")
@@ -814,7 +1117,7 @@ class ChatGPTService:
         Returns:
             结果字典,包含 success, access_token, refresh_token, error
         """
-        url = "https://auth.openai.com/oauth/token"
+        url = self.OAUTH_TOKEN_URL
         
         json_data = {
             "client_id": client_id,
@@ -823,21 +1126,17 @@ class ChatGPTService:
             "refresh_token": refresh_token
         }
         
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
+        headers = {**_JSON_HEADERS, "User-Agent": _DEFAULT_UA}
         
         logger.info("使用 refresh_token 刷新 access_token")
         
-        if not self.session:
-            self.session = await self._create_session(db_session)
-            
+        session = await self._get_session(db_session)
+
         try:
-            response = await self.session.post(url, headers=headers, json=json_data)
+            response = await session.post(url, headers=headers, data=orjson.dumps(json_data))
             status_code = response.status_code
             if status_code == 200:
-                data = response.json()
+                data = self._parse_json(response)
                 return {
                     "success": True,
                     "access_token": data.get("access_token"),
@@ -845,14 +1144,14 @@ class ChatGPTService:
                 }
             else:
                 error_code = None
-                error_msg = response.text
+                error_msg = self._read_error_body(response)
                 try:
-                    error_data = response.json()
+                    error_data = self._parse_json(response)
                     # OAuth 错误通常在 'error' 字段(字符串)中, 详细在 'error_description'
                     if isinstance(error_data, dict):
                         error_code = error_data.get("error")
                         error_msg = error_data.get("error_description", error_msg)
-                except Exception:
+                except ValueError:
                     pass
 
                 logger.warning(f"refresh_token 刷新失败 {status_code}: {error_msg} (code: {error_code})")
@@ -867,17 +1166,34 @@ class ChatGPTService:
             return {"success": False, "error": str(e)}
 
     async def close(self):
-        """关闭 HTTP 会话"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """关闭所有 HTTP 会话"""
+        if self._sessions:
+            await self._close_sessions()
             logger.info("HTTP 会话已关闭")
 
     async def clear_session(self):
-        """清理当前会话和 CF cookies 缓存"""
+        """清理当前会话和 CF cookies 缓存 (包括数据库中持久化的 CF cookies)"""
         self._cf_cookies = None
         self._cf_user_agent = None
         self._cf_cookies_time = 0
+        # 已清除的状态无需再从数据库加载
+        self._cf_state_loaded = True
+
+        # 等待中的保存任务会写回旧 cookies，先取消
+        save_task, self._cf_state_save_task = self._cf_state_save_task, None
+        if save_task and not save_task.done():
+            save_task.cancel()
+            try:
+                await save_task
+            except asyncio.CancelledError:
+                pass
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await settings_service.clear_cf_state(session)
+        except Exception as e:
+            logger.warning(f"清除 CF cookies 状态失败: {e}")
+
         await self.close()
 
 
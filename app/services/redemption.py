@@ -5,14 +5,16 @@
 import logging
 import secrets
 import string
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
-from sqlalchemy import select, and_, or_, func
+from typing import Optional, Dict, Any, List, AsyncIterator
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, and_, or_, func, table, column
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.models import RedemptionCode, RedemptionRecord, Team
+from app.db_migrations import has_fts_table
 from app.utils.pricing import calculate_remaining_days
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_before
 from app.utils.time_utils import get_now
 
 logger = logging.getLogger(__name__)
@@ -593,12 +595,55 @@ class RedemptionService:
                 "error": f"使用兑换码失败: {str(e)}"
             }
 
+    @staticmethod
+    def _build_code_search_filter(search: str):
+        """构建兑换码搜索条件 (兑换码或使用者邮箱模糊匹配)"""
+        pattern = f"%{search}%"
+        if has_fts_table("redemption_codes_fts"):
+            # trigram 索引下 LIKE 本身不区分大小写且可走索引 (ilike 的 lower() 会使索引失效)
+            fts = table("redemption_codes_fts", column("rowid"), column("code"), column("used_by_email"))
+            return RedemptionCode.id.in_(
+                select(fts.c.rowid).where(or_(fts.c.code.like(pattern), fts.c.used_by_email.like(pattern)))
+            )
+        return or_(
+            RedemptionCode.code.ilike(pattern),
+            RedemptionCode.used_by_email.ilike(pattern)
+        )
+
+    async def get_status_counts(
+        self,
+        db_session: AsyncSession,
+        search: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        按状态统计兑换码数量
+
+        Args:
+            db_session: 数据库会话
+            search: 搜索关键词 (与 get_all_codes 使用相同的过滤条件)
+
+        Returns:
+            {status: count}
+        """
+        try:
+            stmt = select(RedemptionCode.status, func.count(RedemptionCode.id)).group_by(RedemptionCode.status)
+            if search:
+                stmt = stmt.where(self._build_code_search_filter(search))
+
+            result = await db_session.execute(stmt)
+            return {status: int(count) for status, count in result.all()}
+
+        except Exception as e:
+            logger.error(f"统计兑换码状态失败: {e}")
+            return {}
+
     async def get_all_codes(
         self,
         db_session: AsyncSession,
         page: int = 1,
         per_page: int = 50,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         获取所有兑换码
@@ -608,21 +653,24 @@ class RedemptionService:
             page: 页码
             per_page: 每页数量
             search: 搜索关键词 (兑换码或邮箱)
+            cursor: 分页游标 (上一页返回的 next_cursor)，提供时使用 keyset 分页代替 OFFSET
 
         Returns:
-            结果字典,包含 success, codes, total, total_pages, current_page, error
+            结果字典,包含 success, codes, total, total_pages, current_page, next_cursor, error
         """
         try:
             # 1. 构建基础查询
             count_stmt = select(func.count(RedemptionCode.id))
-            stmt = select(RedemptionCode).order_by(RedemptionCode.created_at.desc())
+            stmt = (
+                select(RedemptionCode)
+                # 两个多对一关联用 LEFT JOIN 随主查询一并取回，不额外发起查询
+                .options(joinedload(RedemptionCode.bound_team), joinedload(RedemptionCode.used_team))
+                .order_by(RedemptionCode.created_at.desc(), RedemptionCode.id.desc())
+            )
 
             # 2. 如果提供了搜索关键词,添加过滤条件
             if search:
-                search_filter = or_(
-                    RedemptionCode.code.ilike(f"%{search}%"),
-                    RedemptionCode.used_by_email.ilike(f"%{search}%")
-                )
+                search_filter = self._build_code_search_filter(search)
                 count_stmt = count_stmt.where(search_filter)
                 stmt = stmt.where(search_filter)
 
@@ -631,8 +679,7 @@ class RedemptionService:
             total = count_result.scalar() or 0
 
             # 4. 计算分页
-            import math
-            total_pages = math.ceil(total / per_page) if total > 0 else 1
+            total_pages = (total + per_page - 1) // per_page if total > 0 else 1
             if page < 1:
                 page = 1
             if page > total_pages and total_pages > 0:
@@ -640,27 +687,39 @@ class RedemptionService:
             
             offset = (page - 1) * per_page
 
-            # 5. 查询分页数据
-            stmt = stmt.limit(per_page).offset(offset)
+            # 5. 查询分页数据 (多取一条用于判断是否有下一页)
+            stmt = stmt.limit(per_page + 1)
+            cursor_key = decode_cursor(cursor)
+            if cursor_key:
+                stmt = stmt.where(keyset_before(RedemptionCode.created_at, RedemptionCode.id, cursor_key))
+            else:
+                stmt = stmt.offset(offset)
             result = await db_session.execute(stmt)
             codes = result.scalars().all()
 
-            # 构建返回数据
+            next_cursor = None
+            if len(codes) > per_page:
+                codes = codes[:per_page]
+                next_cursor = encode_cursor(codes[-1].created_at, codes[-1].id)
+
+            # 构建返回数据 (时间字段保留 datetime 对象，由调用方按需格式化)
             code_list = []
             for code in codes:
                 code_list.append({
                     "id": code.id,
                     "code": code.code,
                     "status": code.status,
-                    "created_at": code.created_at.isoformat() if code.created_at else None,
-                    "expires_at": code.expires_at.isoformat() if code.expires_at else None,
+                    "created_at": code.created_at,
+                    "expires_at": code.expires_at,
                     "bound_team_id": code.bound_team_id,
                     "used_by_email": code.used_by_email,
                     "used_team_id": code.used_team_id,
-                    "used_at": code.used_at.isoformat() if code.used_at else None,
+                    "used_at": code.used_at,
                     "has_warranty": code.has_warranty,
                     "warranty_days": code.warranty_days,
-                    "warranty_expires_at": code.warranty_expires_at.isoformat() if code.warranty_expires_at else None
+                    "warranty_expires_at": code.warranty_expires_at,
+                    # 展示用 Team: 优先绑定 Team，其次使用的 Team (已随主查询加载)
+                    "team": code.bound_team if code.bound_team_id else code.used_team
                 })
 
             logger.info(f"获取所有兑换码成功: 第 {page} 页, 共 {len(code_list)} 个 / 总数 {total}")
@@ -671,6 +730,7 @@ class RedemptionService:
                 "total": total,
                 "total_pages": total_pages,
                 "current_page": page,
+                "next_cursor": next_cursor,
                 "error": None
             }
 
@@ -683,6 +743,31 @@ class RedemptionService:
                 "error": f"获取所有兑换码失败: {str(e)}"
             }
 
+    async def stream_codes(
+        self,
+        db_session: AsyncSession,
+        search: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[RedemptionCode]:
+        """
+        逐行流式读取兑换码 (用于导出，避免一次性加载全部数据)
+
+        Args:
+            db_session: 数据库会话
+            search: 搜索关键词 (兑换码或邮箱)
+            batch_size: 每批从数据库读取的行数
+
+        Yields:
+            RedemptionCode 对象 (按创建时间倒序)
+        """
+        stmt = select(RedemptionCode).order_by(RedemptionCode.created_at.desc(), RedemptionCode.id.desc())
+        if search:
+            stmt = stmt.where(self._build_code_search_filter(search))
+
+        result = await db_session.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for code in result:
+            yield code
+
     async def get_code_by_code(
         self,
         code: str,
@@ -785,63 +870,162 @@ class RedemptionService:
                 "error": f"获取未使用兑换码失败: {str(e)}"
             }
 
+    @staticmethod
+    def _build_record_filters(
+        email: Optional[str] = None,
+        code: Optional[str] = None,
+        team_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Any]:
+        """构建使用记录筛选条件 (get_all_records 与 get_record_stats 共用)"""
+        filters = []
+        if email:
+            filters.append(RedemptionRecord.email.ilike(f"%{email}%"))
+        if code:
+            filters.append(RedemptionRecord.code.ilike(f"%{code}%"))
+        if team_id:
+            filters.append(RedemptionRecord.team_id == team_id)
+        if start_date:
+            filters.append(RedemptionRecord.redeemed_at >= datetime.combine(start_date, time.min))
+        # date.max 当天之后没有可表示的时间，无需上界 (end_date + 1 天会溢出)
+        if end_date and end_date < date.max:
+            filters.append(RedemptionRecord.redeemed_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        return filters
+
+    async def get_record_stats(
+        self,
+        db_session: AsyncSession,
+        today_start: datetime,
+        week_start: datetime,
+        month_start: datetime,
+        email: Optional[str] = None,
+        code: Optional[str] = None,
+        team_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        统计兑换记录数量 (一次聚合查询，筛选条件与 get_all_records 相同)
+
+        Args:
+            db_session: 数据库会话
+            today_start: 今日开始时间
+            week_start: 本周开始时间
+            month_start: 本月开始时间
+            email/code/team_id/start_date/end_date: 筛选条件
+
+        Returns:
+            统计字典,包含 total, today, this_week, this_month
+        """
+        stmt = select(
+            func.count(RedemptionRecord.id),
+            func.count(RedemptionRecord.id).filter(RedemptionRecord.redeemed_at >= today_start),
+            func.count(RedemptionRecord.id).filter(RedemptionRecord.redeemed_at >= week_start),
+            func.count(RedemptionRecord.id).filter(RedemptionRecord.redeemed_at >= month_start)
+        )
+        filters = self._build_record_filters(email, code, team_id, start_date, end_date)
+        if filters:
+            stmt = stmt.where(and_(*filters))
+
+        total, today, this_week, this_month = (await db_session.execute(stmt)).one()
+        return {
+            "total": total or 0,
+            "today": today or 0,
+            "this_week": this_week or 0,
+            "this_month": this_month or 0
+        }
+
     async def get_all_records(
         self,
         db_session: AsyncSession,
         email: Optional[str] = None,
         code: Optional[str] = None,
-        team_id: Optional[int] = None
+        team_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        page: int = 1,
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        total: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        获取所有兑换记录 (支持筛选)
+        获取兑换记录 (支持筛选，数据库分页)
 
         Args:
             db_session: 数据库会话
             email: 邮箱模糊搜索
             code: 兑换码模糊搜索
             team_id: Team ID 筛选
+            start_date: 开始日期 (包含当天)
+            end_date: 结束日期 (包含当天)
+            page: 页码
+            per_page: 每页数量
+            cursor: 分页游标 (上一页返回的 next_cursor)，提供时使用 keyset 分页代替 OFFSET
+            total: 筛选后的记录总数；调用方已统计过 (如 get_record_stats) 时传入，省去 COUNT 查询
 
         Returns:
-            结果字典,包含 success, records, total, error
+            结果字典,包含 success, records, total, total_pages, current_page, next_cursor, error
         """
         try:
-            stmt = select(RedemptionRecord)
-            
+            # LEFT JOIN 取回 Team 名称，无需再单独查询 Team 列表
+            stmt = select(RedemptionRecord, Team.team_name).outerjoin(Team, Team.id == RedemptionRecord.team_id)
+
             # 添加筛选条件
-            filters = []
-            if email:
-                filters.append(RedemptionRecord.email.ilike(f"%{email}%"))
-            if code:
-                filters.append(RedemptionRecord.code.ilike(f"%{code}%"))
-            if team_id:
-                filters.append(RedemptionRecord.team_id == team_id)
-                
+            filters = self._build_record_filters(email, code, team_id, start_date, end_date)
             if filters:
                 stmt = stmt.where(and_(*filters))
-                
-            stmt = stmt.order_by(RedemptionRecord.redeemed_at.desc())
+
+            # 获取总数 (调用方未提供时查询) 并计算分页
+            if total is None:
+                count_stmt = select(func.count(RedemptionRecord.id))
+                if filters:
+                    count_stmt = count_stmt.where(and_(*filters))
+                total = (await db_session.execute(count_stmt)).scalar() or 0
+            total_pages = (total + per_page - 1) // per_page if total > 0 else 1
+            if page < 1:
+                page = 1
+            if page > total_pages:
+                page = total_pages
+
+            # 查询分页数据 (多取一条用于判断是否有下一页)
+            stmt = stmt.order_by(RedemptionRecord.redeemed_at.desc(), RedemptionRecord.id.desc()).limit(per_page + 1)
+            cursor_key = decode_cursor(cursor)
+            if cursor_key:
+                stmt = stmt.where(keyset_before(RedemptionRecord.redeemed_at, RedemptionRecord.id, cursor_key))
+            else:
+                stmt = stmt.offset((page - 1) * per_page)
             
             result = await db_session.execute(stmt)
-            records = result.scalars().all()
+            rows = result.all()
 
-            # 构建返回数据
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_cursor(rows[-1][0].redeemed_at, rows[-1][0].id)
+
+            # 构建返回数据 (redeemed_at 保留 datetime 对象，由调用方按需格式化)
             record_list = []
-            for record in records:
+            for record, team_name in rows:
                 record_list.append({
                     "id": record.id,
                     "email": record.email,
                     "code": record.code,
                     "team_id": record.team_id,
+                    "team_name": team_name,
                     "account_id": record.account_id,
-                    "redeemed_at": record.redeemed_at.isoformat() if record.redeemed_at else None
+                    "redeemed_at": record.redeemed_at
                 })
 
-            logger.info(f"获取所有兑换记录成功: 共 {len(record_list)} 条")
+            logger.info(f"获取兑换记录成功: 第 {page} 页, 共 {len(record_list)} 条 / 总数 {total}")
 
             return {
                 "success": True,
                 "records": record_list,
-                "total": len(record_list),
+                "total": total,
+                "total_pages": total_pages,
+                "current_page": page,
+                "next_cursor": next_cursor,
                 "error": None
             }
 
@@ -851,6 +1035,9 @@ class RedemptionService:
                 "success": False,
                 "records": [],
                 "total": 0,
+                "total_pages": 1,
+                "current_page": page,
+                "next_cursor": None,
                 "error": f"获取所有兑换记录失败: {str(e)}"
             }
 
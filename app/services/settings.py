@@ -2,7 +2,8 @@
 系统设置服务
 管理系统配置的读取、更新和缓存
 """
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
+import orjson
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Setting
@@ -181,6 +182,60 @@ class SettingsService:
 
         return await self.update_settings(session, settings)
 
+    async def save_cf_state(
+        self,
+        session: AsyncSession,
+        cookies: Dict[str, str],
+        user_agent: Optional[str],
+        ts: float,
+        ttl: Optional[float] = None
+    ) -> bool:
+        """
+        保存 FlareSolverr 获取的 CF cookies 状态 (进程重启后可复用)
+
+        Args:
+            session: 数据库会话
+            cookies: CF cookies
+            user_agent: 获取 cookies 时使用的 User-Agent
+            ts: 获取时间 (time.time())
+            ttl: 保存时的 cookies 缓存时长 (秒)
+
+        Returns:
+            是否保存成功
+        """
+        value = orjson.dumps({"cookies": cookies, "user_agent": user_agent, "ts": ts, "ttl": ttl}).decode()
+        return await self.update_setting(session, "cf_state", value)
+
+    async def clear_cf_state(self, session: AsyncSession) -> bool:
+        """
+        清除已保存的 CF cookies 状态
+
+        Returns:
+            是否清除成功
+        """
+        return await self.update_setting(session, "cf_state", "")
+
+    async def load_cf_state(self, session: AsyncSession) -> Optional[Dict[str, Any]]:
+        """
+        读取已保存的 CF cookies 状态
+
+        Returns:
+            { cookies, user_agent, ts, ttl }，不存在、已清除或格式无效时返回 None
+        """
+        value = await self.get_setting(session, "cf_state")
+        if not value:
+            return None
+
+        try:
+            state = orjson.loads(value)
+        except ValueError:
+            logger.warning("CF cookies 状态格式无效,已忽略")
+            return None
+
+        if not isinstance(state, dict) or not isinstance(state.get("cookies"), dict):
+            return None
+        return state
+
     async def get_log_level(self, session: AsyncSession) -> str:
         """
         获取日志级别
@@ -6,17 +6,23 @@ import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy import select, update, delete, func, or_, table, column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models import Team, TeamAccount, RedemptionCode
+from app.db_migrations import has_fts_table
 from app.services.chatgpt import ChatGPTService
 from app.services.encryption import encryption_service
 from app.utils.token_parser import TokenParser
 from app.utils.jwt_parser import JWTParser
 from app.utils.time_utils import get_now
-from app.utils.pricing import calculate_remaining_days, calculate_price_cents, format_price_yuan
+from app.utils.pricing import (
+    calculate_remaining_days_batch,
+    calculate_prices_cents_batch,
+    format_price_yuan,
+)
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_before
 
 logger = logging.getLogger(__name__)
 
@@ -1444,9 +1450,9 @@ class TeamService:
 
             # 构建返回数据 (不包含敏感信息)
             team_list = []
-            for team in teams:
-                remaining_days = calculate_remaining_days(team.expires_at)
-                price_cents = calculate_price_cents(remaining_days)
+            remaining_days_list = calculate_remaining_days_batch(team.expires_at for team in teams)
+            price_cents_list = calculate_prices_cents_batch(remaining_days_list)
+            for team, remaining_days, price_cents in zip(teams, remaining_days_list, price_cents_list):
                 team_list.append({
                     "id": team.id,
                     "team_name": team.team_name,
@@ -1510,9 +1516,9 @@ class TeamService:
             teams = result.scalars().all()
 
             team_list: List[Dict[str, Any]] = []
-            for team in teams:
-                remaining_days = calculate_remaining_days(team.expires_at)
-                price_cents = calculate_price_cents(remaining_days)
+            remaining_days_list = calculate_remaining_days_batch(team.expires_at for team in teams)
+            price_cents_list = calculate_prices_cents_batch(remaining_days_list)
+            for team, remaining_days, price_cents in zip(teams, remaining_days_list, price_cents_list):
                 reserved_codes = reserved_map.get(team.id, 0)
                 available_seats = max(int(team.max_members or 0) - int(team.current_members or 0) - int(reserved_codes), 0)
                 if available_seats <= 0:
@@ -1670,7 +1676,8 @@ class TeamService:
         db_session: AsyncSession,
         page: int = 1,
         per_page: int = 20,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         获取所有 Team 列表 (用于管理员页面)
@@ -1680,9 +1687,10 @@ class TeamService:
             page: 页码
             per_page: 每页数量
             search: 搜索关键词
+            cursor: 分页游标 (上一页返回的 next_cursor)，提供时使用 keyset 分页代替 OFFSET
 
         Returns:
-            结果字典,包含 success, teams, total, total_pages, current_page, error
+            结果字典,包含 success, teams, total, total_pages, current_page, next_cursor, error
         """
         try:
             # 1. 构建查询语句
@@ -1692,11 +1700,27 @@ class TeamService:
             if search:
                 from sqlalchemy import or_, cast, String
                 search_filter = f"%{search}%"
-                stmt = stmt.where(
-                    or_(
+                if has_fts_table("teams_fts"):
+                    # 文本列走 FTS5 trigram 索引，ID 仍直接匹配
+                    fts = table("teams_fts", column("rowid"), column("email"), column("account_id"), column("team_name"))
+                    text_filter = Team.id.in_(
+                        select(fts.c.rowid).where(
+                            or_(
+                                fts.c.email.like(search_filter),
+                                fts.c.account_id.like(search_filter),
+                                fts.c.team_name.like(search_filter)
+                            )
+                        )
+                    )
+                else:
+                    text_filter = or_(
                         Team.email.ilike(search_filter),
                         Team.account_id.ilike(search_filter),
-                        Team.team_name.ilike(search_filter),
+                        Team.team_name.ilike(search_filter)
+                    )
+                stmt = stmt.where(
+                    or_(
+                        text_filter,
                         cast(Team.id, String).ilike(search_filter)
                     )
                 )
@@ -1707,8 +1731,7 @@ class TeamService:
             total = count_result.scalar() or 0
 
             # 4. 计算分页
-            import math
-            total_pages = math.ceil(total / per_page) if total > 0 else 1
+            total_pages = (total + per_page - 1) // per_page if total > 0 else 1
             if page < 1:
                 page = 1
             if total_pages > 0 and page > total_pages:
@@ -1716,16 +1739,26 @@ class TeamService:
             
             offset = (page - 1) * per_page
 
-            # 5. 查询分页数据
-            final_stmt = stmt.order_by(Team.created_at.desc()).limit(per_page).offset(offset)
+            # 5. 查询分页数据 (多取一条用于判断是否有下一页)
+            final_stmt = stmt.order_by(Team.created_at.desc(), Team.id.desc()).limit(per_page + 1)
+            cursor_key = decode_cursor(cursor)
+            if cursor_key:
+                final_stmt = final_stmt.where(keyset_before(Team.created_at, Team.id, cursor_key))
+            else:
+                final_stmt = final_stmt.offset(offset)
             result = await db_session.execute(final_stmt)
             teams = result.scalars().all()
 
+            next_cursor = None
+            if len(teams) > per_page:
+                teams = teams[:per_page]
+                next_cursor = encode_cursor(teams[-1].created_at, teams[-1].id)
+
             # 构建返回数据
             team_list = []
-            for team in teams:
-                remaining_days = calculate_remaining_days(team.expires_at)
-                price_cents = calculate_price_cents(remaining_days)
+            remaining_days_list = calculate_remaining_days_batch(team.expires_at for team in teams)
+            price_cents_list = calculate_prices_cents_batch(remaining_days_list)
+            for team, remaining_days, price_cents in zip(teams, remaining_days_list, price_cents_list):
                 team_list.append({
                     "id": team.id,
                     "email": team.email,
@@ -1753,6 +1786,7 @@ class TeamService:
                 "total": total,
                 "total_pages": total_pages,
                 "current_page": page,
+                "next_cursor": next_cursor,
                 "error": None
             }
 
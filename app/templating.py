@@ -0,0 +1,48 @@
+"""
+模板引擎配置
+独立于 app.main，供路由模块在模块级导入 (避免循环导入)
+"""
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+
+APP_DIR = Path(__file__).resolve().parent
+
+# 配置模板引擎
+templates = Jinja2Templates(directory=str(APP_DIR / "templates"))
+templates.env.globals["static_version"] = int(datetime.utcnow().timestamp())
+
+# 添加模板过滤器
+def format_datetime(dt):
+    """格式化日期时间"""
+    if not dt:
+        return "-"
+    if isinstance(dt, str):
+        try:
+            # 兼容包含时区信息的字符串
+            dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
+        except:
+            return dt
+    
+    # 统一转换为北京时间显示 (如果它是 aware datetime)
+    import pytz
+    from app.config import settings
+    if dt.tzinfo is None:
+        # 如果是 naive datetime，假设它是本地时区（CST）的时间
+        pass
+    else:
+        # 如果是 aware datetime，转换为目标时区
+        tz = pytz.timezone(settings.timezone)
+        dt = dt.astimezone(tz)
+        
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+def escape_js(value):
+    """转义字符串用于 JavaScript"""
+    if not value:
+        return ""
+    return value.replace("\\", "\\\\").replace("'", "\\'").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+
+templates.env.filters["format_datetime"] = format_datetime
+templates.env.filters["escape_js"] = escape_js
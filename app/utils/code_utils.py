@@ -1,13 +1,36 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Any, Optional
 
+# 通用码至少 8 个字符；更短的输入不可能命中任何码，直接跳过正则
+_MIN_CODE_LEN = 8
+
+# 只缓存较短的输入，避免超长文本占用缓存内存
+_CACHE_MAX_LEN = 256
+
 _STANDARD_CODE_RE = re.compile(r"[A-Za-z0-9]{4}(?:-[A-Za-z0-9]{4}){3}")
-_GENERIC_CODE_RE = re.compile(r"(?i)(?=.*[A-Z])[A-Z0-9-]{8,32}")
+# 标准码长度: 4 * 4 + 3
+_STANDARD_CODE_LEN = 19
+
+# 标准码与通用码合并为一次扫描 (每个位置先尝试 std，再尝试 gen):
+# - 命中 std: 即最靠前的标准码
+# - 命中 gen: 其之前没有标准码，但之后仍可能有，需从该位置之后再找一次标准码 (标准码优先)
+# - 忽略大小写只作用于 gen 分支 (与原先两个独立正则的语义一致)
+_CODE_RE = re.compile(
+    r"(?P<std>[A-Za-z0-9]{4}(?:-[A-Za-z0-9]{4}){3})|(?P<gen>(?i:(?=.*[A-Z])[A-Z0-9-]{8,32}))"
+)
+
+# ASCII 输入先整体转大写再做区分大小写的匹配，省去逐字符的大小写折叠；
+# 转大写不改变 ASCII 文本长度，匹配位置可直接映射回原文本
+_UPPER_STANDARD_CODE_RE = re.compile(r"[A-Z0-9]{4}(?:-[A-Z0-9]{4}){3}")
+_UPPER_CODE_RE = re.compile(
+    r"(?P<std>[A-Z0-9]{4}(?:-[A-Z0-9]{4}){3})|(?P<gen>(?=.*[A-Z])[A-Z0-9-]{8,32})"
+)
 
 
-def normalize_code_input(value: Any) -> Optional[str]:
+def normalize_code_input(value: Any, pattern: Optional[str] = None) -> Optional[str]:
     """
     Normalize code-like input.
 
@@ -15,23 +38,61 @@ def normalize_code_input(value: Any) -> Optional[str]:
     - "ABCD-EFGH-IJKL-MNOP"
     - "ABCD-EFGH-IJKL-MNOP\\n￥12.5"
     - "ABCD-EFGH-IJKL-MNOP 已支付"
+
+    pattern: optional caller-specific code regex, used instead of the built-in
+    standard/generic patterns (compiled once per distinct pattern).
     """
     if value is None:
         return None
 
-    text = str(value).strip()
+    # 绝大多数输入已是 str，跳过 str() 转换
+    text = value.strip() if type(value) is str else str(value).strip()
     if not text:
         return ""
 
-    match = _STANDARD_CODE_RE.search(text)
-    if match:
-        return match.group(0).strip()
+    if len(text) <= _CACHE_MAX_LEN:
+        return _normalize_text(text, pattern)
+    return _normalize_text.__wrapped__(text, pattern)
+
+
+@lru_cache(maxsize=64)
+def _compile_pattern(pattern: str) -> re.Pattern[str]:
+    """Compile a caller-supplied code pattern (kept independent of re's own cache)."""
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str, pattern: Optional[str] = None) -> str:
+    """Extract the code from stripped, non-empty text (pure function, results cached)."""
+    if pattern is not None:
+        match = _compile_pattern(pattern).search(text)
+        return match.group(0).strip() if match else _first_token(text)
+
+    # 最常见的输入就是一个完整的标准码，长度相符时整串匹配即可直接返回
+    if len(text) == _STANDARD_CODE_LEN and _STANDARD_CODE_RE.fullmatch(text):
+        return text
+
+    if len(text) >= _MIN_CODE_LEN:
+        # 非 ASCII 文本 (大小写转换可能改变长度) 仍使用忽略大小写的正则
+        if text.isascii():
+            subject, code_re, standard_re = text.upper(), _UPPER_CODE_RE, _UPPER_STANDARD_CODE_RE
+        else:
+            subject, code_re, standard_re = text, _CODE_RE, _STANDARD_CODE_RE
+
+        match = code_re.search(subject)
+        if match:
+            if match.lastgroup == "gen":
+                standard = standard_re.search(subject, match.start() + 1)
+                if standard:
+                    match = standard
+            return text[match.start():match.end()].strip()
+
+    return _first_token(text)
 
-    match = _GENERIC_CODE_RE.search(text)
-    if match:
-        return match.group(0).strip()
 
-    for line in re.split(r"\r?\n", text):
+def _first_token(text: str) -> str:
+    """Fallback: first whitespace-separated token of the first non-empty line."""
+    for line in text.splitlines():
         line = line.strip()
         if not line:
             continue
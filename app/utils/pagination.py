@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+
+# 游标(keyset)分页:
+# - 游标内容为上一页最后一行的 (created_at, id)，created_at 为空时时间部分留空
+# - 编码为 URL 安全的 base64 (去掉末尾 "=")，可直接放入查询参数
+# - 排序为 (created_at DESC, id DESC)，created_at 为 NULL 的行排在最后 (SQLite 降序默认如此)
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """将 (created_at, id) 编码为分页游标。"""
+    ts = created_at.isoformat() if created_at is not None else ""
+    raw = f"{ts}|{int(row_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    """
+    解析分页游标。
+
+    - 返回 None: 未提供游标或游标格式无效(调用方回退到页码分页)
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(ts) if ts else None), int(row_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def keyset_before(created_col: Any, id_col: Any, cursor_key: Tuple[Optional[datetime], int]) -> Any:
+    """
+    构建 "位于游标之后" 的筛选条件 (对应 created_at DESC NULLS LAST, id DESC 排序)。
+
+    行值比较遇到 NULL 结果为 NULL，会漏掉 created_at 为空的行，需单独处理：
+    - 游标时间非空: 时间更早 (或相同但 id 更小) 的行，加上所有时间为空的行
+    - 游标时间为空: 已进入末尾的空时间段，只比较 id
+    """
+    created_at, row_id = cursor_key
+    if created_at is None:
+        return and_(created_col.is_(None), id_col < row_id)
+    return or_(tuple_(created_col, id_col) < tuple_(created_at, row_id), created_col.is_(None))
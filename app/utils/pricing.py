@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, List, Optional
 
 from app.utils.time_utils import get_now
 
@@ -11,22 +11,31 @@ from app.utils.time_utils import get_now
 DEFAULT_BASE_DAYS = 30
 DEFAULT_BASE_PRICE_CENTS = 1500  # 15.00 元
 
+# 默认参数下四舍五入用的半周期: (days * price + base_days // 2) // base_days
+_DEFAULT_HALF_BASE_DAYS = DEFAULT_BASE_DAYS // 2
 
-def calculate_remaining_days(expires_at: Optional[datetime], now: Optional[datetime] = None) -> Optional[int]:
+
+def calculate_remaining_days(
+    expires_at: Optional[datetime],
+    now: Optional[datetime] = None,
+    now_ordinal: Optional[int] = None,
+) -> Optional[int]:
     """
     计算从“今天”到到期日期的剩余天数(按日期差计算)。
 
     - 返回 None: 无到期时间
     - 返回 0: 已到期或到期日为今天
+    - now_ordinal: 可选，今天的 toordinal()，批量计算时由调用方预先算好
     """
     if not expires_at:
         return None
 
-    if now is None:
-        now = get_now()
+    if now_ordinal is None:
+        now_ordinal = (now or get_now()).toordinal()
 
-    remaining_days = (expires_at.date() - now.date()).days
-    return max(int(remaining_days), 0)
+    # toordinal() 直接返回日期序号，无需构造 date 对象；条件表达式代替 max() 调用
+    remaining_days = expires_at.toordinal() - now_ordinal
+    return remaining_days if remaining_days > 0 else 0
 
 
 def calculate_price_cents(
@@ -44,15 +53,69 @@ def calculate_price_cents(
     if remaining_days <= 0:
         return 0
 
-    numerator = int(remaining_days) * int(base_price_cents)
-    # 四舍五入到“分”(整数)
-    return int((2 * numerator + int(base_days)) // (2 * int(base_days)))
+    # 默认定价: 参数已是整数常量，省去类型转换
+    if base_days == DEFAULT_BASE_DAYS and base_price_cents == DEFAULT_BASE_PRICE_CENTS:
+        return (remaining_days * DEFAULT_BASE_PRICE_CENTS + _DEFAULT_HALF_BASE_DAYS) // DEFAULT_BASE_DAYS
+
+    return _price_cents_kernel(int(remaining_days), int(base_days), int(base_price_cents))
+
+
+def _price_cents_kernel(remaining_days: int, base_days: int, base_price_cents: int) -> int:
+    """
+    价格计算的纯整数内核(remaining_days > 0，参数均已是 int)。
+
+    按整周期拆分: days = q * base_days + r，中间结果不超过 base_days * base_price；
+    四舍五入到“分”(整数)，与 (2 * days * price + base_days) // (2 * base_days) 等价。
+    """
+    q, r = divmod(remaining_days, base_days)
+    return q * base_price_cents + (r * base_price_cents + base_days // 2) // base_days
+
+
+def calculate_remaining_days_batch(
+    expires_list: Iterable[Optional[datetime]],
+    now: Optional[datetime] = None,
+) -> List[Optional[int]]:
+    """批量计算剩余天数(只取一次当前时间)，结果与 calculate_remaining_days 逐个计算一致。"""
+    today = (now or get_now()).toordinal()
+    return [
+        (days if (days := expires_at.toordinal() - today) > 0 else 0) if expires_at else None
+        for expires_at in expires_list
+    ]
+
+
+def calculate_prices_cents_batch(
+    remaining_days_list: Iterable[Optional[int]],
+    base_days: int = DEFAULT_BASE_DAYS,
+    base_price_cents: int = DEFAULT_BASE_PRICE_CENTS,
+) -> List[Optional[int]]:
+    """批量计算价格(分)，结果与 calculate_price_cents 逐个计算一致。"""
+    if base_days == DEFAULT_BASE_DAYS and base_price_cents == DEFAULT_BASE_PRICE_CENTS:
+        return [
+            None if days is None
+            else 0 if days <= 0
+            else (days * DEFAULT_BASE_PRICE_CENTS + _DEFAULT_HALF_BASE_DAYS) // DEFAULT_BASE_DAYS
+            for days in remaining_days_list
+        ]
+    base_days = int(base_days)
+    base_price_cents = int(base_price_cents)
+    return [
+        None if days is None
+        else 0 if days <= 0
+        else _price_cents_kernel(int(days), base_days, base_price_cents)
+        for days in remaining_days_list
+    ]
 
 
 def format_price_yuan(price_cents: Optional[int]) -> Optional[str]:
     """将分格式化为元字符串(去掉无意义的 0)。"""
     if price_cents is None:
         return None
-    yuan = price_cents / 100.0
-    return f"{yuan:.2f}".rstrip("0").rstrip(".")
+    # 纯整数运算，避免浮点往返和多次 rstrip
+    sign = "-" if price_cents < 0 else ""
+    yuan, fen = divmod(abs(price_cents), 100)
+    if fen == 0:
+        return f"{sign}{yuan}"
+    if fen % 10 == 0:
+        return f"{sign}{yuan}.{fen // 10}"
+    return f"{sign}{yuan}.{fen:02d}"
 
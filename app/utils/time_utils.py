@@ -1,4 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Tuple
 import pytz
 from app.config import settings
 
@@ -6,3 +8,16 @@ def get_now() -> datetime:
     """获取当前时区的当前时间 (返回 naive datetime 以保持数据库兼容性)"""
     tz = pytz.timezone(settings.timezone)
     return datetime.now(tz).replace(tzinfo=None)
+
+
+@lru_cache(maxsize=1)
+def get_period_starts(today: date) -> Tuple[datetime, datetime, datetime]:
+    """
+    获取今日/本周/本月的开始时间
+
+    以日期为缓存键，同一天内重复调用直接返回缓存结果，跨天后自动重新计算
+    """
+    today_start = datetime(today.year, today.month, today.day)
+    week_start = today_start - timedelta(days=today_start.weekday())
+    month_start = today_start.replace(day=1)
+    return today_start, week_start, month_start
@@ -0,0 +1,31 @@
+"""
+测试公共配置
+使用临时 SQLite 数据库启动应用 (需在导入 app 之前设置环境变量)
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="team_manage_test_")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP_DIR}/test.db"
+os.environ["DEBUG"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.dependencies.auth import require_admin
+
+
+@pytest.fixture(scope="session")
+def client():
+    """未登录客户端 (进入上下文时执行 lifespan 初始化数据库)"""
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_client(client):
+    """已登录管理员客户端"""
+    app.dependency_overrides[require_admin] = lambda: {"username": "admin", "is_admin": True}
+    yield client
+    app.dependency_overrides.pop(require_admin, None)
@@ -0,0 +1,73 @@
+"""兑换码管理接口测试"""
+import asyncio
+import tempfile
+
+import xlsxwriter
+
+from app.database import AsyncSessionLocal
+from app.routes import admin
+
+
+def test_bulk_delete_requires_login_before_body_validation(client):
+    """未登录时即使请求体格式错误也返回 401，而不是暴露 422 校验详情"""
+    response = client.post(
+        "/admin/codes/bulk-delete",
+        content=b'{"codes": "not-a-list"',
+        headers={"Content-Type": "application/json", "Accept": "application/json"}
+    )
+
+    assert response.status_code == 401
+    assert "codes" not in response.text
+
+
+def test_bulk_delete_validates_body_for_admin(admin_client):
+    """已登录时格式错误的请求体返回 422"""
+    response = admin_client.post(
+        "/admin/codes/bulk-delete",
+        content=b'{"codes": "not-a-list"}',
+        headers={"Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 422
+
+
+def test_export_leaves_no_temp_file(admin_client, monkeypatch, tmp_path):
+    """导出完成后临时文件不留在磁盘上"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    response = admin_client.get("/admin/codes/export")
+
+    assert response.status_code == 200
+    assert response.content[:2] == b"PK"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_failure_removes_temp_file(admin_client, monkeypatch, tmp_path):
+    """生成 Excel 失败时清理临时文件"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    original_close = xlsxwriter.Workbook.close
+
+    def broken_close(self):
+        original_close(self)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(xlsxwriter.Workbook, "close", broken_close)
+
+    response = admin_client.get("/admin/codes/export")
+
+    assert response.status_code == 500
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_unsent_response_leaves_no_temp_file(client, monkeypatch, tmp_path):
+    """响应未发送 (如客户端已断开) 时临时文件同样不留在磁盘上"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    async def export_without_sending():
+        async with AsyncSessionLocal() as db:
+            return await admin.export_codes(search=None, db=db, current_user={})
+
+    response = asyncio.run(export_without_sending())
+
+    assert list(tmp_path.iterdir()) == []
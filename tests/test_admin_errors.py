@@ -0,0 +1,32 @@
+"""管理后台未捕获异常处理测试"""
+import logging
+
+from app.routes import admin
+
+
+def _boom(*args, **kwargs):
+    raise RuntimeError("secret internal detail")
+
+
+def test_json_route_unhandled_error_returns_generic_500(admin_client, monkeypatch, caplog):
+    """JSON 接口未捕获异常: 返回统一的 500 结构，不暴露异常详情，只记录一次堆栈"""
+    monkeypatch.setattr(admin.redemption_service, "delete_code", _boom)
+
+    with caplog.at_level(logging.ERROR):
+        response = admin_client.post("/admin/codes/TEST-CODE/delete")
+
+    assert response.status_code == 500
+    assert response.json() == {"success": False, "error": "服务器内部错误"}
+    assert "secret internal detail" not in response.text
+    assert len([r for r in caplog.records if r.exc_info]) == 1
+
+
+def test_page_route_unhandled_error_uses_http_exception(admin_client, monkeypatch):
+    """页面路由未捕获异常: 按 HTTPException 处理，同样不暴露异常详情"""
+    monkeypatch.setattr(admin.redemption_service, "get_all_codes", _boom)
+
+    response = admin_client.get("/admin/codes", headers={"Accept": "application/json"})
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "加载页面失败"}
+    assert "secret internal detail" not in response.text
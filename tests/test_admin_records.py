@@ -0,0 +1,47 @@
+"""使用记录页面测试"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.models import RedemptionRecord, Team
+
+
+@pytest.fixture(scope="module")
+def records(client):
+    """插入一个 Team 与两条使用记录"""
+    async def seed():
+        async with AsyncSessionLocal() as session:
+            session.add(Team(id=9001, email="records@example.com", access_token_encrypted="x", team_name="Records"))
+            session.add_all([
+                RedemptionRecord(email="a@example.com", code="REC-0001", team_id=9001, account_id="acc",
+                                 redeemed_at=datetime(2024, 3, 1, 12, 0)),
+                RedemptionRecord(email="b@example.com", code="REC-0002", team_id=9001, account_id="acc",
+                                 redeemed_at=datetime(2024, 3, 2, 23, 59, 59)),
+            ])
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def test_records_end_date_is_inclusive(admin_client, records):
+    """结束日期包含当天"""
+    response = admin_client.get("/admin/records?team_id=9001&start_date=2024-03-02&end_date=2024-03-02")
+
+    assert response.status_code == 200
+    assert "REC-0002" in response.text
+    assert "REC-0001" not in response.text
+
+
+def test_records_max_date_does_not_overflow(admin_client, records):
+    """9999-12-31 是合法日期，结束日期加一天不应溢出"""
+    response = admin_client.get("/admin/records?start_date=9999-12-31&end_date=9999-12-31")
+
+    assert response.status_code == 200
+    assert "REC-0001" not in response.text
+
+    response = admin_client.get("/admin/records?team_id=9001&start_date=2024-01-01&end_date=9999-12-31")
+
+    assert response.status_code == 200
+    assert "REC-0001" in response.text and "REC-0002" in response.text
@@ -0,0 +1,122 @@
+"""游标(keyset)分页测试"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database import AsyncSessionLocal
+from app.models import RedemptionCode, RedemptionRecord, Team
+from app.services.redemption import RedemptionService
+from app.services.team import TeamService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _walk(fetch, key):
+    """按游标逐页读取全部结果，返回与按页码读取的结果 (均为 key 列表)"""
+    by_cursor, cursor = [], None
+    while True:
+        result = asyncio.run(fetch(cursor=cursor))
+        by_cursor += [key(item) for item in result[result["items_key"]]]
+        cursor = result["next_cursor"]
+        if not cursor:
+            break
+
+    by_page, page = [], 1
+    while True:
+        result = asyncio.run(fetch(page=page))
+        by_page += [key(item) for item in result[result["items_key"]]]
+        if page >= result["total_pages"]:
+            break
+        page += 1
+    return by_cursor, by_page
+
+
+def test_cursor_round_trip_with_null_timestamp():
+    """时间为空的游标可编码并解析"""
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    ts = datetime(2024, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor(ts, 8)) == (ts, 8)
+
+
+@pytest.fixture(scope="module")
+def null_timestamp_rows(client):
+    """插入部分 created_at 为空的兑换码与 Team"""
+    async def seed():
+        async with AsyncSessionLocal() as session:
+            for i, created_at in enumerate([datetime(2024, 1, 3), None, datetime(2024, 1, 1), None, datetime(2024, 1, 2)]):
+                session.add(RedemptionCode(code=f"KSNULL-{i}", created_at=created_at or datetime(2024, 1, 1)))
+                session.add(Team(email=f"ksnull{i}@example.com", access_token_encrypted="x",
+                                 team_name=f"KSNULL {i}", created_at=created_at or datetime(2024, 1, 1)))
+            await session.flush()
+            # created_at 有默认值，需插入后再置空
+            await session.execute(
+                update(RedemptionCode).where(RedemptionCode.code.in_(["KSNULL-1", "KSNULL-3"])).values(created_at=None)
+            )
+            await session.execute(
+                update(Team).where(Team.email.in_(["ksnull1@example.com", "ksnull3@example.com"])).values(created_at=None)
+            )
+            await session.commit()
+
+    asyncio.run(seed())
+
+
+def test_code_cursor_pagination_keeps_null_created_at(null_timestamp_rows):
+    """兑换码游标分页不丢失 created_at 为空的行，且与页码分页顺序一致"""
+    service = RedemptionService()
+
+    async def fetch(**kwargs):
+        async with AsyncSessionLocal() as session:
+            result = await service.get_all_codes(session, per_page=2, search="KSNULL", **kwargs)
+        return {**result, "items_key": "codes"}
+
+    by_cursor, by_page = _walk(fetch, lambda code: code["code"])
+
+    assert by_cursor == by_page
+    assert sorted(by_cursor) == [f"KSNULL-{i}" for i in range(5)]
+
+
+def test_team_cursor_pagination_keeps_null_created_at(null_timestamp_rows):
+    """Team 游标分页不丢失 created_at 为空的行，且与页码分页顺序一致"""
+    service = TeamService()
+
+    async def fetch(**kwargs):
+        async with AsyncSessionLocal() as session:
+            result = await service.get_all_teams(session, per_page=2, search="ksnull", **kwargs)
+        return {**result, "items_key": "teams"}
+
+    by_cursor, by_page = _walk(fetch, lambda team: team["email"])
+
+    assert by_cursor == by_page
+    assert sorted(by_cursor) == [f"ksnull{i}@example.com" for i in range(5)]
+
+
+def test_record_cursor_pagination_keeps_null_redeemed_at(null_timestamp_rows):
+    """使用记录游标分页不丢失 redeemed_at 为空的行，且与页码分页顺序一致"""
+    async def seed():
+        async with AsyncSessionLocal() as session:
+            team = (await session.execute(select(Team).where(Team.email == "ksnull0@example.com"))).scalar_one()
+            for i in range(5):
+                session.add(RedemptionRecord(email=f"ksnull-record{i}@example.com", code=f"KSNULL-{i}",
+                                             team_id=team.id, account_id="acc",
+                                             redeemed_at=datetime(2024, 2, 1 + i)))
+            await session.flush()
+            await session.execute(
+                update(RedemptionRecord)
+                .where(RedemptionRecord.code.in_(["KSNULL-1", "KSNULL-3"]))
+                .values(redeemed_at=None)
+            )
+            await session.commit()
+
+    asyncio.run(seed())
+    service = RedemptionService()
+
+    async def fetch(**kwargs):
+        async with AsyncSessionLocal() as session:
+            result = await service.get_all_records(session, per_page=2, email="ksnull-record", **kwargs)
+        return {**result, "items_key": "records"}
+
+    by_cursor, by_page = _walk(fetch, lambda record: record["code"])
+
+    assert by_cursor == by_page
+    assert sorted(by_cursor) == [f"KSNULL-{i}" for i in range(5)]